@@ -0,0 +1,162 @@
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from utils import Item, Merchandise
+from efficient import Annealer
+from iterative_search import IterativeSearch
+
+# Frames of the exact search between two checks of the limits
+EXACT_SLICE = 4096
+# Annealing iterations between two checks of the limits
+ANNEAL_SEGMENT = 50
+# Iterations of the heuristic when no limit is given, as in efficient.solve
+ANNEAL_ITERATIONS = 2000
+
+
+class Incumbent(NamedTuple):
+    capital: float                # final capital back in Amsterdam
+    route: List[int]              # from Amsterdam back to Amsterdam
+    purchases: List[List[int]]    # purchases[i]: goods bought at route[i]
+    sales: List[List[Merchandise]]  # sales[i]: goods sold at route[i]
+    nodes: int                    # nodes (exact) or iterations (heuristic) so far
+    elapsed: float                # seconds since the search started
+
+
+def solve(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i for each port i
+    engine: str = 'exact',                # 'exact' or 'heuristic'
+    deadline: Optional[float] = None,     # time.time() at which to stop
+    max_nodes: Optional[int] = None,
+    on_incumbent: Optional[Callable[[Incumbent], None]] = None
+) -> float:
+    """
+    Best capital found by solve_anytime within the limits. on_incumbent is
+    called with every improvement as soon as it is found.
+    """
+    best = k_0
+    for incumbent in solve_anytime(
+        n, d, t_max, c_max, k_0, k_min, items_by_port,
+        engine, deadline, max_nodes
+    ):
+        best = incumbent.capital
+        if on_incumbent is not None:
+            on_incumbent(incumbent)
+
+    return best
+
+def solve_anytime(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i for each port i
+    engine: str = 'exact',                # 'exact' or 'heuristic'
+    deadline: Optional[float] = None,     # time.time() at which to stop
+    max_nodes: Optional[int] = None
+) -> Iterator[Incumbent]:
+    """
+    Yields the best solution found so far every time it improves, starting
+    with staying in Amsterdam. Goods still on board at the end are sold in
+    Amsterdam.
+
+    The exact engine is IterativeSearch, max_nodes bounds its travel nodes;
+    if it stops before reaching a limit the last incumbent is optimal.
+    The heuristic engine is the annealing of efficient.py, max_nodes bounds
+    its iterations and without limits it runs as many as efficient.solve.
+    As in efficient.solve, its routes are scored with their best trades
+    (route_trades), which are also the purchases and sales yielded.
+    Limits are checked between slices of work, so they can be overshot by
+    one slice.
+    """
+    args = (n, d, t_max, c_max, k_0, k_min, items_by_port)
+    if engine == 'exact':
+        return _exact_incumbents(args, deadline, max_nodes)
+    if engine == 'heuristic':
+        return _heuristic_incumbents(args, deadline, max_nodes)
+
+    raise ValueError(f"Unknown engine: {engine!r}")
+
+def _exact_incumbents(
+    args: Tuple, deadline: Optional[float], max_nodes: Optional[int]
+) -> Iterator[Incumbent]:
+    start = time.time()
+    search = IterativeSearch(*args)
+    best = search.best
+    yield Incumbent(
+        best, search.best_route, search.best_purchases, search.best_sold, 0, 0.0
+    )
+
+    while not search.done:
+        if deadline is not None and time.time() >= deadline:
+            return
+        if max_nodes is not None and search.nodes >= max_nodes:
+            return
+
+        search.run(EXACT_SLICE)
+        if search.best > best:
+            best = search.best
+            yield Incumbent(
+                best, search.best_route, search.best_purchases,
+                search.best_sold, search.nodes, time.time() - start
+            )
+
+def _heuristic_incumbents(
+    args: Tuple, deadline: Optional[float], max_nodes: Optional[int]
+) -> Iterator[Incumbent]:
+    start = time.time()
+    annealer = Annealer(*args)
+    best = annealer.k_0
+    yield Incumbent(best, [0], [[]], [[]], 0, 0.0)
+
+    state = annealer.greedy_initial_solution()
+    if len(state.route) == 1:
+        return
+    if deadline is None and max_nodes is None:
+        max_nodes = ANNEAL_ITERATIONS
+
+    def improvement(route: List[int], iterations: int) -> Optional[Incumbent]:
+        # The best trades of the route, never worse than the greedy ones
+        nonlocal best
+        trades = annealer.route_trades.best(route) if len(route) > 2 else None
+        if trades is None or trades.capital <= best:
+            return None
+        best = trades.capital
+        sold, bought = annealer.route_trades.merchandise(route, trades.plan)
+        return Incumbent(
+            best, route.copy(), [[m.k for m in goods] for goods in bought],
+            sold, iterations, time.time() - start
+        )
+
+    # The routes scored are those of the best greedy value of the chain
+    greedy_best = annealer.evaluate_state(state)
+    incumbent = improvement(state.route, 0)
+    if incumbent is not None:
+        yield incumbent
+
+    # The chain goes on across segments with its state and temperature, so
+    # the segments make the same moves as one uninterrupted run
+    temperature = 1000.0
+    iterations = 0
+    while max_nodes is None or iterations < max_nodes:
+        if deadline is not None and time.time() >= deadline:
+            return
+
+        segment = ANNEAL_SEGMENT
+        if max_nodes is not None:
+            segment = min(segment, max_nodes - iterations)
+        chain = annealer.anneal(state, segment, temperature, deadline=deadline)
+        iterations += segment
+        state, temperature = chain.state, chain.temperature
+
+        if chain.best_value > greedy_best:
+            greedy_best = chain.best_value
+            incumbent = improvement(chain.best_state.route, iterations)
+            if incumbent is not None:
+                yield incumbent
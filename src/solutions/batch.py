@@ -0,0 +1,121 @@
+from typing import List, NamedTuple
+import numpy as np
+from instance import Instance
+from spread import SpreadIndex
+
+# Padding of the route matrix after the final return to Amsterdam
+PAD = -1
+
+
+class BatchEvaluation(NamedTuple):
+    feasible: np.ndarray     # (B,) bool
+    time: np.ndarray         # (B,) time used by the route
+    capital: np.ndarray      # (B,) final capital, -inf if not feasible
+
+
+class RouteBatch:
+    """
+    Scores many candidate routes of an instance at once with array operations.
+
+    Routes are the rows of an int matrix, from Amsterdam back to Amsterdam
+    and padded with PAD (see pad_routes); a row with only Amsterdam stays
+    there. A route is feasible if its ports are visited once, every port
+    still leaves time to get back to Amsterdam within T_max and K_min can be
+    paid on every departure.
+
+    Trades are greedy. As in the annealing of efficient.py, goods are bought
+    to be sold at the next port, where everything on board is sold; instead
+    of its knapsack, goods are taken best margin per unit of weight first
+    while they fit in the hold and leave K_min. The capital is a lower bound
+    of the best trades of the route (route_trades.RouteTrades). Python loops
+    run over the stops and the goods of a port, every step works on all the
+    routes together.
+    """
+
+    def __init__(self, instance: Instance):
+        self.instance = instance
+        self.d = instance.d
+        self.weight = np.where(instance.available, instance.weight, np.inf)
+        self.buy = np.where(instance.available, instance.buy, np.inf)
+        self.sell = np.where(instance.available, instance.sell, -np.inf)
+        # ratio[a, b, k]: margin per weight of good k bought at a and sold at b
+        self.ratio = SpreadIndex(instance).ratio
+
+    def evaluate(self, routes: np.ndarray) -> BatchEvaluation:
+        instance, d = self.instance, self.d
+        weight, buy, sell, ratio = self.weight, self.buy, self.sell, self.ratio
+        n, m, k_min = instance.n, instance.m, instance.k_min
+        routes = np.asarray(routes, dtype=np.int64)
+        if routes.ndim != 2:
+            raise ValueError("routes must be a 2-D int matrix")
+        size, length = routes.shape
+        rows = np.arange(size)
+
+        present = routes != PAD
+        lengths = present.sum(axis=1)
+        ports = np.where(present, routes, 0)
+
+        # Shape: Amsterdam at both ends, known ports, no gaps before the padding
+        feasible = (lengths >= 1) & (ports[:, 0] == 0)
+        feasible &= ports[rows, np.maximum(lengths - 1, 0)] == 0
+        positions = np.arange(length)
+        feasible &= (present == (positions < lengths[:, None])).all(axis=1)
+        feasible &= ((ports >= 0) & (ports < n)).all(axis=1)
+        inner = present & (positions > 0) & (positions < lengths[:, None] - 1)
+        feasible &= ~(inner & (ports == 0)).any(axis=1)
+        # Every port once: sorted inner ports have no equal neighbours
+        visits = np.sort(np.where(inner, ports, -np.arange(1, length + 1)), axis=1)
+        feasible &= ~(visits[:, 1:] == visits[:, :-1]).any(axis=1)
+        stays = lengths <= 2
+        ports = np.where(feasible[:, None], ports, 0)
+
+        t_left = np.full(size, float(instance.t_max))
+        capital = np.full(size, float(instance.k_0))
+        held = np.zeros((size, m), dtype=bool)
+
+        for s in range(length):
+            here = ports[:, s]
+            at_stop = (s < lengths) & ~stays
+
+            # Sell everything on board, it was bought to be sold here
+            sold = held & at_stop[:, None]
+            capital += np.where(sold, sell[here], 0.0).sum(axis=1)
+            held &= ~sold
+
+            leaving = (s < lengths - 1) & ~stays
+            if not leaving.any():
+                continue
+            there = ports[:, min(s + 1, length - 1)]
+            feasible &= ~leaving | (capital >= k_min)
+
+            # Greedy purchase for the next port, best ratio first
+            gain = ratio[here, there]
+            order = np.argsort(-gain, axis=1, kind='stable')
+            capacity = np.full(size, float(instance.c_max))
+            for j in range(m):
+                k = order[:, j]
+                w, price = weight[here, k], buy[here, k]
+                take = (leaving & feasible & (gain[rows, k] > 0)
+                        & (w <= capacity) & (capital - price >= k_min))
+                held[rows[take], k[take]] = True
+                capacity -= np.where(take, w, 0.0)
+                capital -= np.where(take, price, 0.0)
+
+            # Sail, if there is time to get back to Amsterdam afterwards
+            leg = d[here, there]
+            feasible &= ~leaving | (t_left >= leg + d[there, 0])
+            t_left -= np.where(leaving, leg, 0.0)
+            capital -= np.where(leaving, k_min, 0.0)
+
+        time = instance.t_max - t_left
+        capital = np.where(feasible, capital, -np.inf)
+        return BatchEvaluation(feasible, time, capital)
+
+
+def pad_routes(routes: List[List[int]]) -> np.ndarray:
+    """Route lists as an int matrix padded with PAD."""
+    length = max((len(route) for route in routes), default=0)
+    matrix = np.full((len(routes), length), PAD, dtype=np.int64)
+    for row, route in enumerate(routes):
+        matrix[row, :len(route)] = route
+    return matrix
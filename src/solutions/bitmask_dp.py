@@ -0,0 +1,231 @@
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import Item, Merchandise
+from spread import SpreadIndex
+from reachability import Reachability, select_ports
+from solution import Solution, build_solution
+
+# Goods on board as a sorted tuple of (k, w): the port where an item was
+# bought and its price are sunk, only its type and weight matter afterwards
+Cargo = Tuple[Tuple[int, float], ...]
+# Back-pointer of a label: (previous step, port, goods kept, goods bought),
+# the trade made at port before leaving it. None before leaving Amsterdam
+Step = Optional[Tuple['Step', int, Cargo, Cargo]]
+# (time left, capital, step)
+Label = Tuple[float, float, Step]
+
+
+def solve(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> float:
+    """
+    Held-Karp style DP over (visited ports bitmask, current port, cargo).
+    Every key keeps only the Pareto labels (time left, capital): a label with
+    more time and more capital than another one with the same cargo dominates it.
+    """
+    best, _, _, _ = _search(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    return best
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> Solution:
+    """
+    Same DP as solve. The best route and its trades are rebuilt from the
+    back-pointers of the label that produced the best final capital.
+    """
+    start = time.time()
+    best, step, ports, stats = _search(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    )
+    stats['elapsed'] = time.time() - start
+
+    # Follow the back-pointers from the last departure to Amsterdam
+    trades = []
+    while step is not None:
+        step, port, kept, bought = step
+        trades.append((ports[port], kept, bought))
+    trades.reverse()
+
+    route, sold, purchases = [], [], []
+    on_board: List[Merchandise] = []
+    for port, kept, bought in trades:
+        # Goods with the same (k, w) are interchangeable
+        remaining = list(kept)
+        sold_here = []
+        for m in on_board:
+            if (m.k, m.w) in remaining:
+                remaining.remove((m.k, m.w))
+            else:
+                sold_here.append(m)
+        bought_here = [
+            Merchandise(port, k, w, items_by_port[port][k].buy_price)
+            for k, w in bought
+        ]
+        on_board = [m for m in on_board if m not in sold_here] + bought_here
+
+        route.append(port)
+        sold.append(sold_here)
+        purchases.append(bought_here)
+
+    if route:
+        route.append(0)
+        sold.append([])
+        purchases.append([])
+    else:
+        route, sold, purchases = [0], [[]], [[]]
+
+    solution = build_solution(
+        d, k_0, k_min, items_by_port, route, sold, purchases, stats
+    )
+    return solution._replace(capital=best)
+
+def _search(
+    n: int, d: List[List[float]], t_max: float, c_max: float,
+    k_0: float, k_min: float, items_by_port: List[List[Item]]
+) -> Tuple[float, Step, List[int], Dict[str, float]]:
+    # Returns the best capital, the step of its last departure, the original
+    # index of every port kept after pruning and the search statistics
+    ports = Reachability(d, t_max).useful
+    n, d, items_by_port = select_ports(ports, d, items_by_port)
+    # Goods that can't be resold at a profit anywhere are never worth buying
+    profitable = SpreadIndex.from_solve_args(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    ).profitable_items
+    candidates = [
+        [k for k, worth in enumerate(profitable[i]) if worth] for i in range(n)
+    ]
+    reach = Reachability(d, t_max)
+
+    best, best_step = k_0, None
+    labels_expanded = 0
+    # Every transition visits one new port, so layers are the bitmask popcount
+    layer: Dict[Tuple[int, int, Cargo], List[Label]] = {
+        (1, 0, ()): [(t_max, k_0, None)]
+    }
+
+    while layer:
+        next_layer: Dict[Tuple[int, int, Cargo], List[Label]] = {}
+
+        for (mask, port, cargo), labels in layer.items():
+            labels_expanded += len(labels)
+            for t_left, capital, step in labels:
+                for new_cargo, (new_capital, kept, bought) in _trades(
+                    port, cargo, capital, c_max, k_min,
+                    items_by_port, candidates[port]
+                ).items():
+                    departure = new_capital - k_min
+                    new_step = (step, port, kept, bought)
+
+                    # Go back to Amsterdam and sell everything on board
+                    if port != 0 and t_left >= d[port][0]:
+                        final_gain = departure + sum(
+                            items_by_port[0][k].sell_price for k, _ in new_cargo
+                        )
+                        if final_gain > best:
+                            best, best_step = final_gain, new_step
+
+                    for port_j in reach.reachable(port, t_left):
+                        if mask >> port_j & 1:
+                            continue
+
+                        if t_left >= d[port][port_j] + d[port_j][0]:
+                            _insert(
+                                next_layer,
+                                (mask | 1 << port_j, port_j, new_cargo),
+                                (t_left - d[port][port_j], departure, new_step)
+                            )
+
+        layer = next_layer
+
+    return best, best_step, ports, {'labels': labels_expanded}
+
+def _trades(
+    port: int, cargo: Cargo, capital: float, c_max: float, k_min: float,
+    items_by_port: List[List[Item]], candidates: List[int]
+) -> Dict[Cargo, Tuple[float, Cargo, Cargo]]:
+    # Best capital for every cargo reachable by selling and then buying at
+    # port, with the goods kept and bought to get it
+    items_at_port = items_by_port[port]
+    result: Dict[Cargo, Tuple[float, Cargo, Cargo]] = {}
+    no_trade = (-float('inf'), (), ())
+
+    for kept, after_sale in _sell(cargo, capital, items_at_port, 0, ()):
+        if after_sale < k_min:
+            continue
+
+        used = sum(w for _, w in kept)
+        for bought, after_purchase in _buy(
+            items_at_port, candidates, 0, (), c_max - used, after_sale, k_min
+        ):
+            new_cargo = tuple(sorted(kept + bought))
+            if after_purchase > result.get(new_cargo, no_trade)[0]:
+                result[new_cargo] = (after_purchase, kept, bought)
+
+    return result
+
+def _sell(
+    cargo: Cargo, capital: float, items_at_port: List[Item],
+    i: int, kept: Cargo
+) -> Iterator[Tuple[Cargo, float]]:
+    if i == len(cargo):
+        yield kept, capital
+        return
+
+    k, w = cargo[i]
+    yield from _sell(cargo, capital, items_at_port, i + 1, kept + ((k, w),))
+
+    sell_price = items_at_port[k].sell_price
+    if sell_price > -float('inf'):
+        yield from _sell(cargo, capital + sell_price, items_at_port, i + 1, kept)
+
+def _buy(
+    items_at_port: List[Item], candidates: List[int], i: int, bought: Cargo,
+    capacity: float, capital: float, k_min: float
+) -> Iterator[Tuple[Cargo, float]]:
+    if i == len(candidates):
+        yield bought, capital
+        return
+
+    yield from _buy(
+        items_at_port, candidates, i + 1, bought, capacity, capital, k_min
+    )
+
+    k = candidates[i]
+    item = items_at_port[k]
+    if capacity - item.w >= 0 and capital - item.buy_price >= k_min:
+        yield from _buy(
+            items_at_port, candidates, i + 1, bought + ((k, item.w),),
+            capacity - item.w, capital - item.buy_price, k_min
+        )
+
+def _insert(
+    layer: Dict[Tuple[int, int, Cargo], List[Label]],
+    key: Tuple[int, int, Cargo], label: Label
+) -> None:
+    labels = layer.get(key)
+    if labels is None:
+        layer[key] = [label]
+        return
+
+    t_left, capital, _ = label
+    for other_t, other_capital, _ in labels:
+        if other_t >= t_left and other_capital >= capital:
+            return
+
+    labels[:] = [
+        other for other in labels
+        if not (t_left >= other[0] and capital >= other[1])
+    ]
+    labels.append(label)
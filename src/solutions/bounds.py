@@ -0,0 +1,137 @@
+from typing import Iterable, List, Optional, Tuple
+from utils import Item
+from spread import SpreadIndex
+from reachability import prune_unreachable_ports
+
+
+class RouteRelaxation:
+    """
+    Relaxation of the problem as a knapsack over ports.
+
+    Every port i on a route contributes at most gain[i]: a full hold of the
+    goods with the best resale margin, taken fractionally, minus the K_min
+    paid when leaving it. Goods bought at i are all on board when leaving,
+    so they fit in C_max, and each of them earns at most its best spread.
+    Every port also has one incoming and one outgoing leg, so a route takes
+    at least the sum of cost[i] = (cheapest leg in + cheapest leg out) / 2
+    over its ports. Relaxing the choice of ports to fractions gives a linear
+    program whose optimum is the Lagrangian bound with the best multiplier
+    on the time limit.
+    """
+
+    def __init__(self, d: List[List[float]], t_max: float, c_max: float,
+                 k_min: float, items_by_port: List[List[Item]],
+                 spread: SpreadIndex):
+        n = len(d)
+        self.gain = [
+            port_gain(c_max, items_by_port, spread, i) - k_min for i in range(n)
+        ]
+        self.cost = [
+            (min((d[j][i] for j in range(n) if j != i), default=0.0)
+             + min((d[i][j] for j in range(n) if j != i), default=0.0)) / 2
+            for i in range(n)
+        ]
+
+        # Multiplier of the root relaxation, reused for every subproblem
+        _, self.multiplier = self.lagrangian(range(1, n), t_max - self.cost[0])
+        self.positive = [max(0.0, gain) for gain in self.gain]
+        self.reduced = [
+            max(0.0, gain - self.multiplier * cost)
+            for gain, cost in zip(self.gain, self.cost)
+        ]
+
+    def lagrangian(self, ports: Iterable[int], budget: float) -> Tuple[float, float]:
+        """
+        Best gain of visiting a fraction of each of ports within budget, and
+        the multiplier of the time limit that attains it as a Lagrangian bound.
+        """
+        if budget < 0:
+            return 0.0, 0.0
+
+        # Fractional knapsack: best gain per unit of time first
+        worth = sorted(
+            (i for i in ports if self.gain[i] > 0),
+            key=lambda i: _ratio(self.gain[i], self.cost[i]), reverse=True
+        )
+        value, time_left = 0.0, budget
+        for i in worth:
+            if self.cost[i] <= time_left:
+                value += self.gain[i]
+                time_left -= self.cost[i]
+            else:
+                return (
+                    value + self.gain[i] * time_left / self.cost[i],
+                    self.gain[i] / self.cost[i]
+                )
+
+        return value, 0.0
+
+    def bound(self, ports: Iterable[int], t_left: float,
+              visited: Optional[List[bool]] = None) -> float:
+        """
+        Upper bound on the gain of the ports still to visit, the candidates
+        not flagged in visited, with t_left to visit them and get back to
+        Amsterdam.
+        """
+        positive, reduced = self.positive, self.reduced
+        plain, relaxed = 0.0, self.multiplier * t_left
+        for i in ports:
+            if visited is None or not visited[i]:
+                plain += positive[i]
+                relaxed += reduced[i]
+
+        return plain if plain < relaxed else relaxed
+
+def upper_bound(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> float:
+    """Upper bound on the final capital of any route, see RouteRelaxation."""
+    n, d, items_by_port = prune_unreachable_ports(n, d, t_max, items_by_port)
+    if n == 1:
+        return k_0
+
+    spread = SpreadIndex.from_solve_args(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    )
+    relaxation = RouteRelaxation(d, t_max, c_max, k_min, items_by_port, spread)
+    # Amsterdam is on every route that leaves it
+    others, _ = relaxation.lagrangian(range(1, n), t_max - relaxation.cost[0])
+
+    return max(k_0, k_0 + relaxation.gain[0] + others)
+
+def optimality_gap(value: float, bound: float) -> float:
+    """Relative distance from value to an upper bound of the optimum."""
+    if bound == 0:
+        return bound - value
+    return (bound - value) / abs(bound)
+
+def port_gain(
+    c_max: float, items_by_port: List[List[Item]],
+    spread: SpreadIndex, port: int
+) -> float:
+    """
+    Fractional knapsack over the best spread of every item bought at port.
+    Items without weight take no room and are always taken whole.
+    """
+    gain, capacity = 0.0, c_max
+    for k in spread.buy_order[port]:
+        w = items_by_port[port][k].w
+        if w <= 0:
+            gain += spread.best_spread_items[port][k]
+            continue
+        if capacity <= 0:
+            continue
+        taken = min(1.0, capacity / w)
+        gain += taken * spread.best_spread_items[port][k]
+        capacity -= taken * w
+
+    return gain
+
+def _ratio(gain: float, cost: float) -> float:
+    return gain / cost if cost > 0 else float('inf')
@@ -1,6 +1,13 @@
-from math import inf
-from typing import List, Tuple
-from  utils import Item, Merchandise
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from  utils import Item
+from bounds import RouteRelaxation
+from reachability import Reachability, prune_unreachable_ports, select_ports
+from route_trades import RouteTrades
+from solution import Solution, build_solution
+from spread import SpreadIndex
 
 
 def solve(
@@ -10,13 +17,144 @@ def solve(
     c_max: float,                         # C_max
     k_0: float,                           # K_0
     k_min: float,                         # K_min
-    items_by_port: List[List[Item]]       # M_i for each port i
+    items_by_port: List[List[Item]],      # M_i for each port i
+    workers: Optional[int] = None         # processes for the parallel mode
 ) -> float:
+    n, d, items_by_port = prune_unreachable_ports(n, d, t_max, items_by_port)
+    if workers is not None:
+        return _solve_parallel(
+            n, d, t_max, c_max, k_0, k_min, items_by_port, workers
+        )
+
     return _solve(
         n, d, t_max, c_max, k_0, k_min, 
         items_by_port, 0, k_0, [False for _ in range(n)],
-        [], [[] for _ in range(n)]
+        [], RouteTrades(c_max, k_0, k_min, items_by_port)
+    )
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> Solution:
+    """
+    Same search as solve. The route of the best final capital is copied
+    whenever it improves, and its trades are the RouteTrades plan over it.
+    """
+    start = time.time()
+    ports = Reachability(d, t_max).useful
+    size, sub_d, sub_items = select_ports(ports, d, items_by_port)
+    route_trades = RouteTrades(c_max, k_0, k_min, sub_items)
+    best_route: List[int] = []
+    best = _solve(
+        size, sub_d, t_max, c_max, k_0, k_min, sub_items, 0, k_0,
+        [False for _ in range(size)], [], route_trades, None, best_route
+    )
+    stats = {'elapsed': time.time() - start}
+
+    if not best_route:
+        # No route beats staying in Amsterdam
+        return build_solution(d, k_0, k_min, items_by_port, [0], [[]], [[]], stats)
+
+    plan = route_trades.best(best_route).plan
+    sold, bought = route_trades.merchandise(best_route, plan, ports)
+    solution = build_solution(
+        d, k_0, k_min, items_by_port, [ports[p] for p in best_route],
+        sold, bought, stats
+    )
+    return solution._replace(capital=best)
+
+_shared_best = None
+
+
+class _Pruning:
+    """
+    Optimistic bound of the routes that start with a given prefix, checked
+    against the best capital of all the workers of the parallel mode.
+
+    Every port left on a route, from Amsterdam to the current one, earns at
+    most its RouteRelaxation gain; the ports still reachable earn at most
+    the relaxation bound within the time left.
+    """
+
+    def __init__(self, d: List[List[float]], t_max: float, c_max: float,
+                 k_0: float, k_min: float, items_by_port: List[List[Item]],
+                 shared_best):
+        n = len(d)
+        spread = SpreadIndex.from_solve_args(
+            n, d, t_max, c_max, k_0, k_min, items_by_port
+        )
+        self.relaxation = RouteRelaxation(
+            d, t_max, c_max, k_min, items_by_port, spread
+        )
+        self.reach = Reachability(d, t_max)
+        self.k_0 = k_0
+        self.shared_best = shared_best
+
+    def bound(self, route: List[int], port: int, t_left: float,
+              visited: List[bool]) -> float:
+        gain = self.relaxation.gain
+        return (
+            self.k_0 + sum(gain[p] for p in route) + gain[port]
+            + self.relaxation.bound(
+                self.reach.reachable(port, t_left), t_left, visited
+            )
+        )
+
+    def incumbent(self, best: float) -> float:
+        return max(best, self.shared_best.value)
+
+    def publish(self, value: float) -> None:
+        with self.shared_best.get_lock():
+            if value > self.shared_best.value:
+                self.shared_best.value = value
+
+def _solve_parallel(
+    n: int, d: List[List[float]], t_max: float, c_max: float,
+    k_0: float, k_min: float, items_by_port: List[List[Item]], workers: int
+) -> float:
+    # Routes are split by their first port; the subtrees are handed out one at
+    # a time, those with more time left first, so idle workers take the rest
+    first_ports = sorted(
+        (port_j for port_j in range(1, n)
+         if t_max - (d[0][port_j] + d[port_j][0]) >= 0),
+        key=lambda port_j: d[0][port_j]
+    )
+    shared_best = multiprocessing.Value('d', k_0)
+    args = (n, d, t_max, c_max, k_0, k_min, items_by_port)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(shared_best,)
+    ) as executor:
+        results = list(executor.map(
+            _solve_first_port, [args] * len(first_ports), first_ports
+        ))
+
+    return max([k_0, shared_best.value] + results)
+
+def _init_worker(shared_best) -> None:
+    global _shared_best
+    _shared_best = shared_best
+
+def _solve_first_port(args: Tuple, port_j: int) -> float:
+    n, d, t_max, c_max, k_0, k_min, items_by_port = args
+    visited = [False for _ in range(n)]
+    visited[port_j] = True
+
+    # The best capital found by any worker prunes this subtree while it runs
+    pruning = _Pruning(d, t_max, c_max, k_0, k_min, items_by_port, _shared_best)
+    max_profit = _solve(
+        n, d, t_max - d[0][port_j], c_max, k_0, k_min, items_by_port,
+        port_j, pruning.incumbent(k_0), visited, [0],
+        RouteTrades(c_max, k_0, k_min, items_by_port), pruning
     )
+    pruning.publish(max_profit)
+
+    return max_profit
 
 def _solve(
     n: int, d: List[List[float]], t_max: float,
@@ -24,21 +162,28 @@ def _solve(
     items_by_port: List[List[Item]],
     port_i: int, max_profit: float,
     visited: List[bool], route: List[int],
-    l_i: List[List[Merchandise]]
+    route_trades: RouteTrades,
+    pruning: Optional[_Pruning] = None,
+    best_route: Optional[List[int]] = None
 ) -> float:
-    # If I stay in Amsterdam, finish the travel
+    # best_route: if given, gets a copy of the route of the best capital
+    # If I stay in Amsterdam, finish the travel with the best trades
     if port_i == 0 and visited[0]:
         route.append(0)
-        print(route)
-        max_profit = max(
-            max_profit,
-            _profit_by_route(
-                c_max, k_0, k_min, items_by_port, 
-                route, l_i, 0, max_profit
-            ) 
-        )
+        value = route_trades.value(route)
+        if best_route is not None and value > max_profit:
+            best_route[:] = route
         route.pop() 
-        return max_profit
+        if pruning is not None and value > max_profit:
+            pruning.publish(value)
+        return max(max_profit, value)
+
+    # Parallel mode: drop the subtree if no route in it can beat the best
+    # capital of any worker
+    if pruning is not None:
+        max_profit = pruning.incumbent(max_profit)
+        if pruning.bound(route, port_i, t_max, visited) <= max_profit:
+            return max_profit
 
     route.append(port_i)
     # Go to port j from port i
@@ -53,7 +198,8 @@ def _solve(
                 _solve(
                     n, d, t_max - d[port_i][port_j], c_max, 
                     k_0, k_min, items_by_port, port_j,
-                    max_profit, visited, route, l_i
+                    max_profit, visited, route, route_trades, pruning,
+                    best_route
                 )
             )
             visited[port_j] = False
@@ -61,96 +207,3 @@ def _solve(
     route.pop()
             
     return max_profit
-
-def _profit_by_route(
-    c_max: float, k_0: float, k_min: float,
-    items_by_port: List[List[Item]], route: List[int],
-    l_i: List[List[Merchandise]], i: int, max_profit: float
-) -> float:
-    if k_0 < 0:
-        return float(-inf)
-    
-    port = route[i]
-    
-    if i == len(route) - 1:
-        return k_0 + _sell_all(l_i[port], items_by_port[port])
-    
-    for sell in _sell(l_i[port], items_by_port[port], [], 0, []):
-        rest = [l for l in l_i[port] if l not in sell[0]]
-        sold = [l for l in l_i[port] if l in sell[0]]
-        capacities_sold = _calculate_weight(sold)
-        for buy in _buy(port, items_by_port[port], [], 0, [], c_max + capacities_sold, k_0 + sell[1] - k_min):
-            capacities_bought = _calculate_weight(buy[0])
-            l_i[route[i+1]] = rest + buy[0]
-            max_profit = max(
-                max_profit, 
-                _profit_by_route(
-                    c_max + capacities_sold - capacities_bought, k_0 + sell[1] - k_min - buy[1],
-                    k_min, items_by_port, route, l_i, i + 1, max_profit
-                )
-            )
-    
-    return max_profit
-
-def _sell(
-    goods: List[Merchandise],
-    items_at_port: List[Item], 
-    goods_sold: List[Merchandise],
-    i: int,
-    result: List[Tuple[List[Merchandise], int]]
-) -> List[Tuple[List[Merchandise], int]]:
-    if i == len(goods):
-        sold = 0
-        for j in goods_sold:
-            sold += items_at_port[j.k].sell_price
-            
-        result.append((goods_sold.copy(), sold))
-        return result
-    
-    merchandise = goods[i]
-    goods_sold.append(merchandise)
-    _sell(goods, items_at_port, goods_sold, i + 1, result)
-    goods_sold.pop()
-    _sell(goods, items_at_port, goods_sold, i + 1, result)
-        
-    return result
-
-def _sell_all(goods: List[Merchandise], items_at_port: List[Item]) -> float:
-    sold = 0
-    for j in goods:
-        sold += items_at_port[j.k].sell_price
-    
-    return sold
-
-def _buy(
-    port: int,
-    items_at_port: List[Item], 
-    goods_sold: List[Merchandise],
-    i: int,
-    result: List[Tuple[List[Merchandise], int]],
-    c_max: float, 
-    k: float
-) -> List[Tuple[List[Merchandise], int]]:
-    if i == len(items_at_port):
-        sold = 0
-        for j in goods_sold:
-            sold += j.buy_price
-            
-        result.append((goods_sold.copy(), sold))
-        return result
-    
-    merchandise = Merchandise(port, i, items_at_port[i].w, items_at_port[i].buy_price)
-    if c_max - merchandise.w >= 0 and k - merchandise.buy_price >= 0:
-        goods_sold.append(merchandise)
-        _buy(port, items_at_port, goods_sold, i + 1, result, c_max - merchandise.w, k - merchandise.buy_price)
-        goods_sold.pop()
-    _buy(port, items_at_port, goods_sold, i + 1, result, c_max, k)
-        
-    return result
-
-def _calculate_weight(goods: List[Merchandise]) -> float:
-    peso = 0
-    for item in goods:
-        peso += item.w
-        
-    return peso
\ No newline at end of file
@@ -1,5 +1,17 @@
-from typing import List
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 from utils import Item, Merchandise
+from transposition import TranspositionTable, state_key
+from spread import SpreadIndex
+from reachability import Reachability, prune_unreachable_ports, select_ports
+from solution import Solution, build_solution
+from bounds import RouteRelaxation
+
+# Incumbent of the branch and bound: (route, (port, good) sold along it,
+# goods still on board when it gets back to Amsterdam)
+Plan = Tuple[List[int], List[Tuple[int, Merchandise]], List[Merchandise]]
 
 
 def solve(
@@ -9,8 +21,15 @@ def solve(
     c_max: float,                         # C_max
     k_0: float,                           # K_0
     k_min: float,                         # K_min
-    items_by_port: List[List[Item]]       # M_i para cada puerto i
+    items_by_port: List[List[Item]],      # M_i para cada puerto i
+    workers: Optional[int] = None         # procesos para el modo paralelo
 ) -> float:
+    n, d, items_by_port = prune_unreachable_ports(n, d, t_max, items_by_port)
+    if workers is not None:
+        return _solve_parallel(
+            n, d, t_max, c_max, k_0, k_min, items_by_port, workers
+        )
+
     ports_visited = [False] * n
     ports_visited[0] = True
     m = len(items_by_port[0])
@@ -119,4 +138,401 @@ def travel(
             if i > 0:
                 ports_visited[i] = False
             
-    return max_gain
\ No newline at end of file
+    return max_gain
+
+def solve_branch_and_bound(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i para cada puerto i
+) -> Tuple[float, int]:
+    """
+    Same sell/buy/travel search as solve, but it keeps the best final capital
+    found so far and drops every subtree whose optimistic bound can't beat it.
+    Returns the maximum final capital and the number of nodes expanded.
+    """
+    best, nodes, _ = _branch_and_bound(
+        n, d, t_max, c_max, k_0, k_min, items_by_port, (), None
+    )
+    return best, nodes
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i para cada puerto i
+) -> Solution:
+    """
+    Branch and bound of solve_branch_and_bound, returning the best route with
+    its trades. The search keeps the route and the sales of the current branch
+    and copies them only when the incumbent improves.
+    """
+    start = time.time()
+    best, nodes, plan = _branch_and_bound(
+        n, d, t_max, c_max, k_0, k_min, items_by_port, (), None
+    )
+    stats = {'nodes': nodes, 'elapsed': time.time() - start}
+
+    route, sales, on_board = plan if plan is not None else ([0], [], [])
+    position = {port: idx for idx, port in enumerate(route[:-1])}
+    sold = [[] for _ in route]
+    bought = [[] for _ in route]
+    for port, m in sales:
+        sold[position[port]].append(m)
+        bought[position[m.i]].append(m)
+    for m in on_board:
+        bought[position[m.i]].append(m)
+
+    solution = build_solution(
+        d, k_0, k_min, items_by_port, route, sold, bought, stats
+    )
+    return solution._replace(capital=best)
+
+def _branch_and_bound(
+    n: int, d: List[List[float]], t_max: float, c_max: float,
+    k_0: float, k_min: float, items_by_port: List[List[Item]],
+    prefix: Tuple[int, ...], shared_best
+) -> Tuple[float, int, Optional[Plan]]:
+    # prefix: first ports of the routes to explore (0 = back to Amsterdam)
+    # shared_best: multiprocessing.Value with the best capital of all workers
+    # Returns the best capital, the nodes expanded and the plan of the best
+    # capital if this search found it, with the original port indices
+    ports = Reachability(d, t_max).useful
+    n, d, items_by_port = select_ports(ports, d, items_by_port)
+    size = len(items_by_port[0])
+    reach = Reachability(d, t_max)
+    spread = SpreadIndex.from_solve_args(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    )
+    # Only goods with a profitable destination, best margin per weight first
+    buy_order = spread.buy_order
+    best_sell = [
+        max(items_by_port[i][k].sell_price for i in range(n))
+        for k in range(size)
+    ]
+    relaxation = RouteRelaxation(d, t_max, c_max, k_min, items_by_port, spread)
+    best, nodes, depth = k_0, 0, 0
+    # Current branch: route so far and (port, good) of every sale on it
+    route, sales = [0], []
+    plan: Optional[Plan] = None
+
+    def bound(
+        t_max: float, k_0: float, port: int, items_on_board: List[Merchandise],
+        ports_visited: List[bool], trading: bool
+    ) -> float:
+        # Cargo sold at its best price anywhere, plus the relaxation of the
+        # trades still possible at this port, which has to be left, and at
+        # the ports from which Amsterdam can still be reached
+        upper = k_0 + sum(best_sell[m.k] for m in items_on_board)
+        if trading:
+            upper += relaxation.gain[port]
+
+        return upper + relaxation.bound(
+            reach.reachable(port, t_max), t_max, ports_visited
+        )
+
+    def sell(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: List[bool], j: int
+    ) -> float:
+        nonlocal nodes
+        if bound(t_max, k_0, port, items_on_board, ports_visited, True) <= best:
+            return -1
+        nodes += 1
+
+        if j >= len(items_on_board):
+            return buy(
+                t_max, c_max, k_0, port, items_on_board, ports_visited, 0
+            )
+
+        m = items_on_board.pop(j)
+        sell_price = items_by_port[port][m.k].sell_price
+        sales.append((port, m))
+        sell_gain = sell(
+            t_max, c_max + m.w, k_0 + sell_price, port,
+            items_on_board, ports_visited, j
+        )
+        sales.pop()
+        items_on_board.insert(j, m)
+
+        return max(sell_gain, sell(
+            t_max, c_max, k_0, port, items_on_board, ports_visited, j + 1
+        ))
+
+    def buy(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: List[bool], j: int
+    ) -> float:
+        nonlocal nodes
+        if k_min > k_0:
+            return -1
+        if bound(t_max, k_0, port, items_on_board, ports_visited, True) <= best:
+            return -1
+        nodes += 1
+
+        if j >= len(buy_order[port]):
+            return travel(
+                t_max, c_max, k_0 - k_min, port, items_on_board, ports_visited
+            )
+
+        purchase = -1
+        k = buy_order[port][j]
+        current_item = items_by_port[port][k]
+        funds = k_0 - current_item.buy_price
+        capacity_left = c_max - current_item.w
+
+        if k_min <= funds and capacity_left >= 0:
+            items_on_board.append(Merchandise(
+                i=port, k=k, w=current_item.w,
+                buy_price=current_item.buy_price
+            ))
+            purchase = buy(
+                t_max, capacity_left, funds, port,
+                items_on_board, ports_visited, j + 1
+            )
+            items_on_board.pop()
+
+        return max(purchase, buy(
+            t_max, c_max, k_0, port, items_on_board, ports_visited, j + 1
+        ))
+
+    def travel(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: List[bool]
+    ) -> float:
+        nonlocal best, nodes, depth, plan
+        if shared_best is not None and nodes % SYNC_EVERY == 0:
+            best = max(best, shared_best.value)
+        if bound(t_max, k_0, port, items_on_board, ports_visited, False) <= best:
+            return -1
+        nodes += 1
+
+        max_gain = -1
+        for i in range(n):
+            if (ports_visited[i] and i > 0) or i == port:
+                continue
+            if depth < len(prefix) and i != prefix[depth]:
+                continue
+
+            if t_max >= d[port][i] + d[i][0]:
+                if i == 0:
+                    next_port_gain = k_0 + sum([
+                        items_by_port[0][m.k].sell_price for m in items_on_board
+                    ])
+                    if next_port_gain > best:
+                        best = next_port_gain
+                        _publish(shared_best, best)
+                        plan = (
+                            [ports[p] for p in route] + [0],
+                            [(ports[p], m._replace(i=ports[m.i]))
+                             for p, m in sales],
+                            [m._replace(i=ports[m.i]) for m in items_on_board]
+                        )
+                else:
+                    ports_visited[i] = True
+                    depth += 1
+                    route.append(i)
+                    next_port_gain = sell(
+                        t_max - d[port][i], c_max, k_0, i,
+                        items_on_board, ports_visited, 0
+                    )
+                    route.pop()
+                    depth -= 1
+                    ports_visited[i] = False
+                max_gain = max(max_gain, next_port_gain)
+
+        return max_gain
+
+    ports_visited = [False] * n
+    ports_visited[0] = True
+    buy(t_max, c_max, k_0, 0, [], ports_visited, 0)
+
+    return best, nodes, plan
+
+# Nodes between two reads of the incumbent shared by the workers
+SYNC_EVERY = 64
+_shared_best = None
+
+def _solve_parallel(
+    n: int, d: List[List[float]], t_max: float, c_max: float,
+    k_0: float, k_min: float, items_by_port: List[List[Item]], workers: int
+) -> float:
+    # Every route prefix is an independent branch-and-bound subtree. Prefixes
+    # are handed out one at a time, largest first, so idle workers keep
+    # taking the remaining subtrees while a big one is still running
+    prefixes = _root_prefixes(n, d, t_max, workers)
+    shared_best = multiprocessing.Value('d', k_0)
+    args = (n, d, t_max, c_max, k_0, k_min, items_by_port)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(shared_best,)
+    ) as executor:
+        results = list(executor.map(
+            _branch_and_bound_task, [args] * len(prefixes), prefixes
+        ))
+
+    return max([k_0, shared_best.value] + results)
+
+def _root_prefixes(
+    n: int, d: List[List[float]], t_max: float, workers: int
+) -> List[Tuple[int, ...]]:
+    first = [
+        (t_max - d[0][i], (i,)) for i in range(1, n)
+        if t_max >= d[0][i] + d[i][0]
+    ]
+    if len(first) >= 4 * workers:
+        return [prefix for _, prefix in sorted(first, reverse=True)]
+
+    # Too few first hops to keep every worker busy: split on the first two
+    second = []
+    for t_left, (i,) in first:
+        second.append((0.0, (i, 0)))
+        for j in range(1, n):
+            if j != i and t_left >= d[i][j] + d[j][0]:
+                second.append((t_left - d[i][j], (i, j)))
+
+    return [prefix for _, prefix in sorted(second, reverse=True)]
+
+def _init_worker(shared_best) -> None:
+    global _shared_best
+    _shared_best = shared_best
+
+def _branch_and_bound_task(
+    args: Tuple, prefix: Tuple[int, ...]
+) -> float:
+    best, _, _ = _branch_and_bound(*args, prefix, _shared_best)
+    return best
+
+def _publish(shared_best, value: float) -> None:
+    if shared_best is None:
+        return
+    with shared_best.get_lock():
+        if value > shared_best.value:
+            shared_best.value = value
+
+def solve_memoized(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i para cada puerto i
+    max_entries: Optional[int] = 1_000_000
+) -> Tuple[float, TranspositionTable]:
+    """
+    Same sell/buy/travel search as solve, but the result of every arrival at a
+    port and of every departure is stored in a transposition table, so a state
+    reached again through another ordering is solved only once.
+    Returns the maximum final capital and the table with its hit/miss counters.
+    """
+    n, d, items_by_port = prune_unreachable_ports(n, d, t_max, items_by_port)
+    profitable = SpreadIndex.from_solve_args(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    ).profitable_items
+    # Goods that can't be resold at a profit anywhere are never bought
+    candidates = [
+        [k for k, worth in enumerate(profitable[i]) if worth] for i in range(n)
+    ]
+    table = TranspositionTable(max_entries)
+
+    def sell(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: int, j: int
+    ) -> float:
+        if j == 0:
+            key = ('sell',) + state_key(
+                port, t_max, ports_visited, c_max, k_0, items_on_board
+            )
+            cached = table.get(key)
+            if cached is not None:
+                return cached
+
+        if j >= len(items_on_board):
+            gain = buy(
+                t_max, c_max, k_0, port, items_on_board, ports_visited, 0
+            )
+        else:
+            m = items_on_board.pop(j)
+            sell_price = items_by_port[port][m.k].sell_price
+            gain = sell(
+                t_max, c_max + m.w, k_0 + sell_price, port,
+                items_on_board, ports_visited, j
+            )
+            items_on_board.insert(j, m)
+            gain = max(gain, sell(
+                t_max, c_max, k_0, port, items_on_board, ports_visited, j + 1
+            ))
+
+        if j == 0:
+            table.put(key, gain)
+        return gain
+
+    def buy(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: int, j: int
+    ) -> float:
+        if k_min > k_0:
+            return -1
+
+        if j >= len(candidates[port]):
+            return travel(
+                t_max, c_max, k_0 - k_min, port, items_on_board, ports_visited
+            )
+
+        purchase = -1
+        k = candidates[port][j]
+        current_item = items_by_port[port][k]
+        funds = k_0 - current_item.buy_price
+        capacity_left = c_max - current_item.w
+
+        if k_min <= funds and capacity_left >= 0:
+            items_on_board.append(Merchandise(
+                i=port, k=k, w=current_item.w,
+                buy_price=current_item.buy_price
+            ))
+            purchase = buy(
+                t_max, capacity_left, funds, port,
+                items_on_board, ports_visited, j + 1
+            )
+            items_on_board.pop()
+
+        return max(purchase, buy(
+            t_max, c_max, k_0, port, items_on_board, ports_visited, j + 1
+        ))
+
+    def travel(
+        t_max: float, c_max: float, k_0: float, port: int,
+        items_on_board: List[Merchandise], ports_visited: int
+    ) -> float:
+        key = ('travel',) + state_key(
+            port, t_max, ports_visited, c_max, k_0, items_on_board
+        )
+        cached = table.get(key)
+        if cached is not None:
+            return cached
+
+        max_gain = -1
+        for i in range(n):
+            if (ports_visited >> i & 1 and i > 0) or i == port:
+                continue
+
+            if t_max >= d[port][i] + d[i][0]:
+                next_port_gain = sell(
+                    t_max - d[port][i], c_max, k_0, i, items_on_board,
+                    ports_visited | 1 << i, 0
+                ) if i > 0 else k_0 + sum([
+                    items_by_port[0][m.k].sell_price for m in items_on_board
+                ])
+                max_gain = max(max_gain, next_port_gain)
+
+        table.put(key, max_gain)
+        return max_gain
+
+    return max(k_0, buy(t_max, c_max, k_0, 0, [], 1, 0)), table
@@ -1,25 +1,56 @@
 import math
 import random
-from typing import List, Set, Optional
-from utils import Item, Merchandise
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Set, Optional, Tuple
+from utils import Item
+from purchase import best_purchase
+from solution import Solution, build_solution
+from bounds import optimality_gap, upper_bound
+from route_trades import RouteTrades
+
+
+# (capital, time, used_capacity, cargo) al llegar a un puerto de la ruta
+Checkpoint = Tuple[float, float, float, int]
+
+# Temperaturas extremas de las cadenas del modo paralelo
+T_HOT = 1000.0
+T_COLD = 1.0
+# Iteraciones de cada cadena entre dos intentos de intercambio de réplicas
+EXCHANGE_EVERY = 100
 
 
 # Clase para representar el estado
 class State:
+    """
+    Estado compacto: la carga es un entero donde el bit i * m + k indica que
+    se lleva la mercancía k comprada en el puerto i.
+    """
+    __slots__ = ('current_port', 'capital', 'time', 'used_capacity',
+                 'route', 'cargo')
+
     def __init__(self, current_port: int = 0, capital: float = 0.0, 
                  time: float = 0.0, used_capacity: float = 0.0,
-                 route: List[int] = None, inventory: List[Merchandise] = None):
+                 route: List[int] = None, cargo: int = 0):
         self.current_port = current_port
         self.capital = capital
         self.time = time
         self.used_capacity = used_capacity
         self.route = route if route is not None else []
-        self.inventory = inventory if inventory is not None else []
+        self.cargo = cargo
     
     def copy(self) -> 'State':
         return State(self.current_port, self.capital, self.time,
-                    self.used_capacity, self.route.copy(), 
-                    self.inventory.copy())
+                    self.used_capacity, self.route.copy(), self.cargo)
+
+    def assign(self, other: 'State') -> None:
+        """Copia otro estado sobre este sin crear objetos nuevos."""
+        self.current_port = other.current_port
+        self.capital = other.capital
+        self.time = other.time
+        self.used_capacity = other.used_capacity
+        self.route[:] = other.route
+        self.cargo = other.cargo
 
 # Solución principal usando Simulated Annealing
 def solve(
@@ -29,32 +60,146 @@ def solve(
     c_max: float,                         # C_max
     k_0: float,                           # K_0
     k_min: float,                         # K_min
-    items_by_port: List[List[Item]]       # M_i para cada puerto i
+    items_by_port: List[List[Item]],      # M_i para cada puerto i
+    workers: Optional[int] = None,        # procesos para el modo paralelo
+    time_budget: Optional[float] = None,  # segundos para el modo paralelo
+    replica_exchange: bool = False        # parallel tempering en vez de multi-start
 ) -> float:
     """
     Resuelve el problema del Comerciante Holandés usando Simulated Annealing.
     Retorna el máximo capital final alcanzable.
+
+    Con workers se ejecuta una cadena por proceso, cada una a una temperatura
+    distinta (ver temperature_ladder). Sin replica_exchange las cadenas son
+    independientes y se enfrían como la cadena secuencial; con replica_exchange
+    mantienen su temperatura y cada EXCHANGE_EVERY iteraciones se intenta
+    intercambiar los estados de temperaturas vecinas. Con time_budget las
+    cadenas corren hasta agotar ese tiempo, si no hacen las mismas 2000
+    iteraciones que el modo secuencial.
+
+    Las compras de cada ruta visitada son las del greedy; a la mejor ruta se
+    le calculan al final las compras y ventas óptimas (route_trades).
+    """
+    args = (n, d, t_max, c_max, k_0, k_min, items_by_port)
+    annealer = Annealer(*args)
+
+    initial_state = annealer.greedy_initial_solution()
+    if len(initial_state.route) == 1:
+        return initial_state.capital
+
+    if workers is not None:
+        best_value, best_route = _solve_parallel(
+            args, initial_state, workers, time_budget, replica_exchange
+        )
+        return max(best_value, annealer.exact_capital(best_route), k_0)
+
+    best_state = annealer.simulated_annealing(initial_state, max_iter=2000)
+    final_capital = max(
+        annealer.evaluate_state(best_state),
+        annealer.exact_capital(best_state.route)
+    )
+    
+    return max(final_capital, k_0)
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i para cada puerto i
+) -> Solution:
     """
+    Misma búsqueda que solve. Lo vendido y comprado en cada parada de la
+    mejor ruta son las compras y ventas óptimas para esa ruta. Las
+    estadísticas incluyen una cota superior del óptimo (bounds.upper_bound)
+    y la brecha relativa hasta ella.
+    """
+    start = time.time()
+    annealer = Annealer(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    initial_state = annealer.greedy_initial_solution()
+    route, iterations = initial_state.route, 0
+    if len(route) > 1:
+        route = annealer.simulated_annealing(initial_state, max_iter=2000).route
+        iterations = 2000
+
+    best = annealer.route_trades.best(route) if len(route) > 1 else None
+    if best is None:
+        # Quedarse en Amsterdam
+        route, trades = [0], ([[]], [[]])
+    else:
+        trades = annealer.route_trades.merchandise(route, best.plan)
+    stats = {'iterations': iterations, 'elapsed': time.time() - start}
+    solution = build_solution(d, k_0, k_min, items_by_port, route, *trades, stats)
+    if solution.capital < k_0:
+        solution = build_solution(
+            d, k_0, k_min, items_by_port, [0], [[]], [[]], stats
+        )
+
+    # Distancia máxima al óptimo
+    stats['upper_bound'] = upper_bound(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    stats['gap'] = optimality_gap(solution.capital, stats['upper_bound'])
+    return solution
+
+class Chain(NamedTuple):
+    """Resultado de un tramo de Simulated Annealing."""
+    state: State          # estado actual al terminar
+    value: float
+    best_state: State     # mejor estado visitado en el tramo
+    best_value: float
+    temperature: float    # temperatura al terminar, para continuar la cadena
+
+
+class Annealer:
+    """Simulated Annealing sobre las rutas de una instancia."""
+
+    def __init__(self, n: int, d: List[List[float]], t_max: float,
+                 c_max: float, k_0: float, k_min: float,
+                 items_by_port: List[List[Item]]):
+        self.n = n
+        self.d = d
+        self.t_max = t_max
+        self.c_max = c_max
+        self.k_0 = k_0
+        self.k_min = k_min
+        self.items_by_port = items_by_port
+        self.m = max(len(items) for items in items_by_port)
+        self.full_port = (1 << self.m) - 1
+        self.route_trades = RouteTrades(c_max, k_0, k_min, items_by_port)
     
-    def greedy_initial_solution() -> State:
+    def cargo_items(self, state: State) -> Iterator[Tuple[int, int]]:
+        """Recorre la carga (puerto, mercancía) en el orden en que se compró."""
+        m, full_port = self.m, self.full_port
+        for idx, i in enumerate(state.route):
+            if i == 0 and idx > 0:
+                continue
+            bits = (state.cargo >> (i * m)) & full_port
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                yield i, low.bit_length() - 1
+    
+    def greedy_initial_solution(self) -> State:
         """Genera una solución inicial usando heurística greedy."""
-        state = State(current_port=0, capital=k_0, time=0.0, 
-                     used_capacity=0.0, route=[0], inventory=[])
+        d, k_min = self.d, self.k_min
+        state = State(current_port=0, capital=self.k_0, time=0.0, 
+                     used_capacity=0.0, route=[0], cargo=0)
         
-        unvisited = set(range(1, n))  # Todos los puertos excepto Amsterdam
+        unvisited = set(range(1, self.n))  # Todos los puertos excepto Amsterdam
         
         while unvisited:
             # Vender mercancías en el puerto actual si es beneficioso
-            state = sell_in_current_port(state, items_by_port)
+            self.sell_in_current_port(state)
 
             # Elegir próximo puerto
-            next_port = select_next_port_greedy(state, unvisited, d, t_max)
+            next_port = self.select_next_port_greedy(state, unvisited)
             
             if next_port is None:
                 break
                         
             # Comprar mercancías prometedoras
-            state = buy_in_current_port(state, items_by_port, next_port)
+            self.buy_in_current_port(state, next_port)
             
             if state.capital < k_min:
                 break
@@ -72,74 +217,55 @@ def solve(
             state.capital -= k_min
             state.current_port = 0
             state.route.append(0)
-            state = sell_all_in_amsterdam(state, items_by_port)
+            self.sell_all_in_amsterdam(state)
         
         return state
     
-    def sell_in_current_port(state: State, items_by_port: List[List[Item]]) -> State:
+    def sell_in_current_port(self, state: State) -> None:
         """Vende mercancías en el puerto actual si es beneficioso."""
-        new_state = state.copy()
-        new_inventory = []
+        items_by_port, m = self.items_by_port, self.m
+        port = state.current_port
         
-        for merch in state.inventory:
-            i, k, w, buy_price = merch
+        for i, k in list(self.cargo_items(state)):
             # Solo vender si el precio de venta actual es mayor que el de compra
             # y no estamos en el puerto donde se compró
-            if i != state.current_port:
-                sell_price = items_by_port[state.current_port][k].sell_price
-                if sell_price > buy_price:
-                    new_state.capital += sell_price
-                    # No agregar al inventario (se vendió)
-                else:
-                    new_inventory.append(merch)
-            else:
-                new_inventory.append(merch)
-        
-        new_state.inventory = new_inventory
-        return new_state
+            if i != port:
+                sell_price = items_by_port[port][k].sell_price
+                if sell_price > items_by_port[i][k].buy_price:
+                    state.capital += sell_price
+                    state.cargo &= ~(1 << (i * m + k))
     
-    def buy_in_current_port(state: State, items_by_port: List[List[Item]], next_port: int) -> State:
+    def buy_in_current_port(self, state: State, next_port: int) -> None:
         """Compra mercancías usando mochila 0/1 para optimizar."""
-        new_state = state.copy()
+        items_by_port, m = self.items_by_port, self.m
         port = state.current_port
         
         # Capacidad y capital disponibles
-        available_capacity = c_max - state.used_capacity
-        available_capital = state.capital - k_min
+        available_capacity = self.c_max - state.used_capacity
+        available_capital = state.capital - self.k_min
         
-        # Filtrar items que podemos comprar
-        candidate_items = []
-        for k, item in enumerate(items_by_port[state.current_port]):
-            if item.w <= available_capacity and item.buy_price <= available_capital:
-                # Estimar ganancia (simple heurística)
-                estimated_profit = items_by_port[next_port][k].sell_price - item.buy_price
-                if estimated_profit > 0:
-                    candidate_items.append((k, item.w, item.buy_price, estimated_profit))
+        # Ganancia estimada de cada ítem si se vende en el próximo puerto
+        estimated_profit = [
+            items_by_port[next_port][k].sell_price - item.buy_price
+            for k, item in enumerate(items_by_port[port])
+        ]
         
-        if not candidate_items:
-            return new_state
+        # Mochila 0/1 exacta con capacidad y capital como restricciones
+        purchase = best_purchase(
+            items_by_port[port], estimated_profit,
+            available_capacity, available_capital
+        )
         
-        # Mochila 0/1 simplificada (para capacidad)
-        # Ordenar por profit/weight ratio
-        candidate_items.sort(key=lambda x: x[3]/x[1], reverse=True)
-        
-        for k, weight, buy_price, profit in candidate_items:
-            if (available_capacity >= weight and 
-                available_capital >= buy_price):
-                # Comprar el item
-                new_state.capital -= buy_price
-                new_state.used_capacity += weight
-                new_state.inventory.append(
-                    Merchandise(port, k, weight, buy_price)
-                )
-                available_capacity -= weight
-                available_capital -= buy_price
-
-        return new_state
+        for k in purchase.items:
+            item = items_by_port[port][k]
+            state.capital -= item.buy_price
+            state.used_capacity += item.w
+            state.cargo |= 1 << (port * m + k)
     
-    def select_next_port_greedy(state: State, unvisited: Set[int], 
-                               d: List[List[float]], t_max: float) -> Optional[int]:
+    def select_next_port_greedy(self, state: State,
+                                unvisited: Set[int]) -> Optional[int]:
         """Selecciona el próximo puerto usando heurística greedy."""
+        d = self.d
         best_port = None
         best_score = -float('inf')
         current = state.current_port
@@ -149,11 +275,11 @@ def solve(
             time_back = d[port][0]
             total_time = state.time + travel_time + time_back
             
-            if total_time <= t_max:
+            if total_time <= self.t_max:
                 # Score heurístico: cuanto más cerca y más items tenga
                 # Podemos mejorarlo considerando el potencial de ganancia
                 distance_score = 1.0 / (travel_time + 1e-6)
-                items_count = len(items_by_port[port])
+                items_count = len(self.items_by_port[port])
                 item_score = min(items_count / 10.0, 1.0)  # Normalizado
                 
                 score = distance_score + item_score
@@ -164,149 +290,306 @@ def solve(
         
         return best_port
     
-    def sell_all_in_amsterdam(state: State, items_by_port: List[List[Item]]) -> State:
+    def sell_all_in_amsterdam(self, state: State) -> None:
         """Vende todo el inventario en Amsterdam."""
-        new_state = state.copy()
-        
-        for merch in state.inventory:
-            i, k, w, buy_price = merch
-            # Vender en Amsterdam (puerto 0)
-            sell_price = items_by_port[0][k].sell_price
-            new_state.capital += sell_price
-        
-        new_state.inventory = []
-        return new_state
+        state.capital = self.evaluate_state(state)
+        state.cargo = 0
     
-    def evaluate_state(state: State, items_by_port: List[List[Item]]) -> float:
+    def exact_capital(self, route: List[int]) -> float:
+        """Capital final de la ruta con las mejores compras y ventas posibles."""
+        if len(route) < 3:
+            return self.k_0
+        return self.route_trades.value(route)
+
+    def evaluate_state(self, state: State) -> float:
         """Evalúa un estado (capital final después de vender en Amsterdam)."""
-        # Primero simular venta de todo en Amsterdam
-        new_state = sell_all_in_amsterdam(state, items_by_port)
+        amsterdam = self.items_by_port[0]
+        capital = state.capital
+        for _, k in self.cargo_items(state):
+            # Vender en Amsterdam (puerto 0)
+            capital += amsterdam[k].sell_price
         
-        return new_state.capital
+        return capital
     
-    def simulate_route(route: List[int], d: List[List[float]], 
-                      items_by_port: List[List[Item]]) -> Optional[State]:
-        """Simula una ruta completa y retorna el estado final."""
-        if not route or route[0] != 0:
-            return None
+    def simulate_route(self, route: List[int], state: State,
+                       checkpoints: List[Checkpoint], first_changed: int,
+                       suffix: List[Checkpoint]) -> bool:
+        """
+        Simula una ruta sobre `state`, que se reutiliza en cada llamada.
+        checkpoints[i] es el estado al llegar al puerto i de la ruta actual;
+        como la compra en un puerto depende del siguiente, la simulación se
+        retoma desde el puerto anterior a first_changed, la primera posición
+        en que la ruta nueva difiere de la actual. Los checkpoints de los
+        puertos siguientes quedan en suffix.
+        Retorna False si la ruta no es factible.
+        """
+        d, t_max, c_max, k_min = self.d, self.t_max, self.c_max, self.k_min
+        start = first_changed - 1
+        if not route or route[0] != 0 or start >= len(checkpoints):
+            return False
         
-        state = State(current_port=0, capital=k_0, time=0.0,
-                     used_capacity=0.0, route=[0], inventory=[])
+        state.capital, state.time, state.used_capacity, state.cargo = checkpoints[start]
+        state.current_port = route[start]
+        # La carga se recorre siguiendo la ruta, los puertos aún no
+        # visitados no tienen mercancías
+        state.route = route
+        suffix.clear()
         
-        for i in range(1, len(route)):
+        for i in range(start + 1, len(route)):
             # Vender
-            state = sell_in_current_port(state, items_by_port)
+            self.sell_in_current_port(state)
 
             next_port = route[i]
             travel_time = d[state.current_port][next_port]
             
             # Verificar tiempo
             if state.time + travel_time > t_max:
-                return None
+                return False
             
             # Comprar
-            state = buy_in_current_port(state, items_by_port, next_port)
+            self.buy_in_current_port(state, next_port)
             
             # Verificar restricciones
             if state.capital < 0 or state.used_capacity > c_max:
-                return None
+                return False
             
             # Viajar
             state.time += travel_time
             state.current_port = next_port
             state.capital -= k_min
-            state.route.append(next_port)
+            suffix.append(
+                (state.capital, state.time, state.used_capacity, state.cargo)
+            )
         
         # Vender todo en Amsterdam
-        state = sell_all_in_amsterdam(state, items_by_port)
+        self.sell_all_in_amsterdam(state)
         
-        return state
+        return True
     
-    def generate_neighbor(state: State) -> List[int]:
-        """Genera una ruta vecina modificando la ruta actual."""
+    def generate_neighbor(self, state: State,
+                          rng: random.Random = random) -> Tuple[List[int], int]:
+        """
+        Genera una ruta vecina modificando la ruta actual.
+        Retorna la ruta y la primera posición que cambió (len(ruta) si ninguna).
+        """
+        n = self.n
         route = state.route.copy()
+        first_changed = len(route)
         
         if len(route) == 3:  # Solo Amsterdam + 1 puerto + Amsterdam
             # Insertar un puerto aleatorio
             available = [p for p in range(1, n) if p not in route]
             if available:
-                insert_pos = random.randint(1, len(route)-2)
-                insert_port = random.choice(available)
+                insert_pos = rng.randint(1, len(route)-2)
+                insert_port = rng.choice(available)
                 route.insert(insert_pos, insert_port)
-            return route
+                first_changed = insert_pos
+            return route, first_changed
         
-        operation = random.choice(['swap', 'insert', 'remove', 'reverse'])
+        operation = rng.choice(['swap', 'insert', 'remove', 'reverse'])
         
         if operation == 'swap':
             # Intercambiar dos puertos (no Amsterdam)
-            i = random.randint(1, len(route)-2)
-            j = random.randint(1, len(route)-2)
+            i = rng.randint(1, len(route)-2)
+            j = rng.randint(1, len(route)-2)
             if i != j:
                 route[i], route[j] = route[j], route[i]
+                first_changed = min(i, j)
         
         elif operation == 'insert':
             # Insertar un puerto no visitado
             visited = set(route)
             available = [p for p in range(1, n) if p not in visited]
             if available:
-                insert_pos = random.randint(1, len(route)-2)
-                insert_port = random.choice(available)
+                insert_pos = rng.randint(1, len(route)-2)
+                insert_port = rng.choice(available)
                 route.insert(insert_pos, insert_port)
+                first_changed = insert_pos
         
         elif operation == 'remove':
             # Remover un puerto (no Amsterdam)
-            remove_pos = random.randint(1, len(route)-2)
+            remove_pos = rng.randint(1, len(route)-2)
             route.pop(remove_pos)
+            first_changed = remove_pos
         
         elif operation == 'reverse':
             # Invertir un segmento
-            i = random.randint(1, len(route)-2)
-            j = random.randint(i, len(route)-2)
+            i = rng.randint(1, len(route)-2)
+            j = rng.randint(i, len(route)-2)
             route[i:j+1] = reversed(route[i:j+1])
+            if i != j:
+                first_changed = i
         
-        return route
+        return route, first_changed
     
-    def simulated_annealing(initial_state: State, max_iter: int = 3000) -> State:
+    def simulated_annealing(self, initial_state: State, max_iter: int = 3000) -> State:
         """Algoritmo de Simulated Annealing para mejorar la solución."""
+        return self.anneal(initial_state, max_iter).best_state
+
+    def anneal(self, initial_state: State, max_iter: Optional[int],
+               temperature: float = 1000.0, cooling_rate: float = 0.995,
+               deadline: Optional[float] = None,
+               rng: random.Random = random) -> Chain:
+        """
+        Un tramo de Simulated Annealing desde initial_state, que se reutiliza.
+        Termina tras max_iter iteraciones o al llegar a deadline (time.time()),
+        lo que ocurra antes; alguno de los dos debe estar definido.
+        """
         current_state = initial_state        
         best_state = initial_state.copy()
-        current_value = evaluate_state(current_state, items_by_port)
+        current_value = self.evaluate_state(current_state)
         best_value = current_value
         
-        temperature = 1000.0
-        cooling_rate = 0.995
+        # Estado reutilizado para simular cada vecino
+        new_state = State()
+        
+        # Checkpoints de la ruta actual (válidos hasta donde es factible)
+        checkpoints: List[Checkpoint] = [(self.k_0, 0.0, 0.0, 0)]
+        suffix: List[Checkpoint] = []
+        self.simulate_route(current_state.route, new_state, checkpoints, 1, suffix)
+        checkpoints.extend(suffix)
         
-        for _ in range(max_iter):
+        iteration = 0
+        while max_iter is None or iteration < max_iter:
+            if deadline is not None and time.time() >= deadline:
+                break
+            iteration += 1
+
             # Generar vecino
-            new_route = generate_neighbor(current_state)
-            new_state = simulate_route(new_route, d, items_by_port)
+            new_route, first_changed = self.generate_neighbor(current_state, rng)
             
-            if new_state is None:
+            if not self.simulate_route(new_route, new_state, checkpoints,
+                                       first_changed, suffix):
                 continue
             
-            new_value = evaluate_state(new_state, items_by_port)
+            new_value = self.evaluate_state(new_state)
             
             # Criterio de aceptación
             delta = new_value - current_value
             
-            if delta > 0 or random.random() < math.exp(delta / temperature):
-                current_state = new_state
+            if delta > 0 or rng.random() < math.exp(delta / temperature):
+                # Intercambiar en lugar de copiar
+                current_state, new_state = new_state, current_state
                 current_value = new_value
+                del checkpoints[first_changed:]
+                checkpoints.extend(suffix)
                 
                 if current_value > best_value:
-                    best_state = current_state.copy()
+                    best_state.assign(current_state)
                     best_value = current_value
             
             # Enfriar
             temperature *= cooling_rate
         
-        return best_state
-    
-    initial_state = greedy_initial_solution()
-    if len(initial_state.route) == 1:
-        return initial_state.capital
+        return Chain(current_state, current_value, best_state, best_value,
+                     temperature)
 
-    best_state = simulated_annealing(initial_state, max_iter=2000)
-    final_capital = evaluate_state(best_state, items_by_port)
-    
-    return max(final_capital, k_0)
\ No newline at end of file
+    def replay(self, route: List[int]) -> Optional[Tuple[float, List[List[int]]]]:
+        """
+        Simula una ruta desde Amsterdam. Retorna el capital final y las
+        mercancías compradas en cada parada, o None si no es factible.
+        """
+        simulated = self._simulate_from_start(route)
+        if simulated is None:
+            return None
+        capital, checkpoints = simulated
+
+        # Lo comprado en una parada sigue a bordo al llegar a la siguiente
+        m = self.m
+        purchases = [
+            [k for k in range(m) if (cargo >> (port * m + k)) & 1]
+            for port, (_, _, _, cargo) in zip(route, checkpoints[1:])
+        ]
+        purchases.append([])
+        return capital, purchases
+
+    def _simulate_from_start(
+        self, route: List[int]
+    ) -> Optional[Tuple[float, List[Checkpoint]]]:
+        state = State()
+        checkpoints: List[Checkpoint] = [(self.k_0, 0.0, 0.0, 0)]
+        suffix: List[Checkpoint] = []
+        if not self.simulate_route(route, state, checkpoints, 1, suffix):
+            return None
+        checkpoints.extend(suffix)
+        return state.capital, checkpoints
+
+
+def temperature_ladder(chains: int) -> List[float]:
+    """Temperaturas en progresión geométrica de T_HOT a T_COLD."""
+    if chains == 1:
+        return [T_HOT]
+    return [T_HOT * (T_COLD / T_HOT) ** (c / (chains - 1)) for c in range(chains)]
+
+def _solve_parallel(args: Tuple, initial_state: State, workers: int,
+                    time_budget: Optional[float],
+                    replica_exchange: bool) -> Tuple[float, List[int]]:
+    # Mejor valor encontrado por las cadenas y la ruta que lo obtuvo
+    temperatures = temperature_ladder(workers)
+    deadline = None if time_budget is None else time.time() + time_budget
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(args,)
+    ) as executor:
+        if replica_exchange:
+            return _parallel_tempering(executor, initial_state, temperatures, deadline)
+
+        # Multi-start: cadenas independientes desde la solución greedy
+        max_iter = 2000 if deadline is None else None
+        futures = [
+            executor.submit(_anneal_task, initial_state, max_iter, temperature,
+                            0.995, deadline, random.getrandbits(32))
+            for temperature in temperatures
+        ]
+        best = max((future.result() for future in futures),
+                   key=lambda chain: chain.best_value)
+        return best.best_value, best.best_state.route
+
+def _parallel_tempering(executor: ProcessPoolExecutor, initial_state: State,
+                        temperatures: List[float],
+                        deadline: Optional[float]) -> Tuple[float, List[int]]:
+    chains = len(temperatures)
+    states = [initial_state] * chains
+    best_value, best_route = -float('inf'), initial_state.route
+    rounds = 0
+
+    while True:
+        results = list(executor.map(
+            _anneal_task, states, [EXCHANGE_EVERY] * chains, temperatures,
+            [1.0] * chains, [deadline] * chains,
+            [random.getrandbits(32) for _ in range(chains)]
+        ))
+        for chain in results:
+            if chain.best_value > best_value:
+                best_value, best_route = chain.best_value, chain.best_state.route
+        states = [chain.state for chain in results]
+        values = [chain.value for chain in results]
+
+        # Intercambio entre temperaturas vecinas (pares e impares alternados):
+        # se acepta con probabilidad min(1, exp((v_b - v_a) (1/T_a - 1/T_b)))
+        for a in range(rounds % 2, chains - 1, 2):
+            b = a + 1
+            exponent = (values[b] - values[a]) * (
+                1 / temperatures[a] - 1 / temperatures[b]
+            )
+            if exponent >= 0 or random.random() < math.exp(exponent):
+                states[a], states[b] = states[b], states[a]
+
+        rounds += 1
+        if deadline is None:
+            if rounds * EXCHANGE_EVERY >= 2000:
+                break
+        elif time.time() >= deadline:
+            break
+
+    return best_value, best_route
+
+def _init_worker(args: Tuple) -> None:
+    global _annealer
+    _annealer = Annealer(*args)
+
+def _anneal_task(state: State, max_iter: Optional[int], temperature: float,
+                 cooling_rate: float, deadline: Optional[float],
+                 seed: int) -> Chain:
+    return _annealer.anneal(state, max_iter, temperature, cooling_rate,
+                            deadline, random.Random(seed))
@@ -0,0 +1,75 @@
+from typing import List, Tuple
+import numpy as np
+from utils import Item
+
+
+class Instance:
+    """
+    Dense representation of an instance: weights and prices as (n, m) arrays
+    and distances as an (n, n) array. Unavailable goods keep the inf/-inf
+    convention of Item and are flagged False in `available`.
+    """
+
+    def __init__(self, d: np.ndarray, t_max: float, c_max: float, k_0: float,
+                 k_min: float, weight: np.ndarray, buy: np.ndarray,
+                 sell: np.ndarray):
+        self.d = d
+        self.t_max = t_max
+        self.c_max = c_max
+        self.k_0 = k_0
+        self.k_min = k_min
+        self.weight = weight
+        self.buy = buy
+        self.sell = sell
+        self.available = np.isfinite(weight) & np.isfinite(buy) & np.isfinite(sell)
+
+    @property
+    def n(self) -> int:
+        return self.d.shape[0]
+
+    @property
+    def m(self) -> int:
+        return self.weight.shape[1]
+
+    @classmethod
+    def from_solve_args(
+        cls,
+        n: int,
+        d: List[List[float]],             # d[i][j] = d_{ij}
+        t_max: float,                     # T_max
+        c_max: float,                     # C_max
+        k_0: float,                       # K_0
+        k_min: float,                     # K_min
+        items_by_port: List[List[Item]]   # M_i for each port i
+    ) -> 'Instance':
+        m = len(items_by_port[0]) if items_by_port else 0
+        # (n, m, 3) array of (w, buy_price, sell_price)
+        items = np.array(items_by_port, dtype=float).reshape(n, m, 3)
+
+        return cls(
+            np.array(d, dtype=float).reshape(n, n), t_max, c_max, k_0, k_min,
+            items[:, :, 0].copy(), items[:, :, 1].copy(), items[:, :, 2].copy()
+        )
+
+    def to_solve_args(self) -> Tuple[
+        int, List[List[float]], float, float, float, float, List[List[Item]]
+    ]:
+        """Arguments in the order expected by every solve function."""
+        return (
+            self.n, self.d.tolist(), self.t_max, self.c_max,
+            self.k_0, self.k_min, self.items_by_port()
+        )
+
+    def items_by_port(self) -> List[List[Item]]:
+        return [
+            [Item(*map(float, item)) for item in zip(w, buy, sell)]
+            for w, buy, sell in zip(self.weight, self.buy, self.sell)
+        ]
+
+    def profit(self) -> np.ndarray:
+        """(n, m) array of sell_price - buy_price at the same port, -inf if unavailable."""
+        return np.where(self.available, self.sell - self.buy, -np.inf)
+
+    def affordable(self, capacity: float, budget: float) -> np.ndarray:
+        """(n, m) mask of the goods that fit in `capacity` and cost at most `budget`."""
+        return self.available & (self.weight <= capacity) & (self.buy <= budget)
@@ -0,0 +1,225 @@
+import time
+from typing import List, Optional
+from utils import Item, Merchandise
+from spread import SpreadIndex
+from reachability import Reachability, select_ports
+from solution import Solution, build_solution
+
+# Frame opcodes. A frame is a tuple (opcode, *args)
+SELL, BUY, TRAVEL, ARRIVE = 0, 1, 2, 3
+UNDO_SELL, UNDO_BUY, UNDO_DEPART, UNDO_ARRIVE = 4, 5, 6, 7
+
+
+def solve(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> float:
+    search = IterativeSearch(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    search.run()
+    return search.best
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> Solution:
+    start = time.time()
+    search = IterativeSearch(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    search.run()
+    stats = {'nodes': search.nodes, 'elapsed': time.time() - start}
+
+    solution = build_solution(
+        d, k_0, k_min, items_by_port, search.best_route,
+        search.best_sold, search.best_bought, stats
+    )
+    return solution._replace(capital=search.best)
+
+
+class IterativeSearch:
+    """
+    The sell/buy/travel search of brute_force_JAT driven by an explicit stack
+    of small frames instead of recursion. All decisions are applied to one
+    mutable state and every frame that changes it pushes an undo frame with
+    the previous values, so backtracking restores them exactly.
+    The search can be suspended after any number of steps and resumed.
+    """
+
+    def __init__(self, n: int, d: List[List[float]], t_max: float,
+                 c_max: float, k_0: float, k_min: float,
+                 items_by_port: List[List[Item]]):
+        # Ports that can't be part of any route within t_max are dropped;
+        # ports[i] is the index in the original instance of port i
+        self.ports = Reachability(d, t_max).useful
+        n, d, items_by_port = select_ports(self.ports, d, items_by_port)
+        profitable = SpreadIndex.from_solve_args(
+            n, d, t_max, c_max, k_0, k_min, items_by_port
+        ).profitable_items
+
+        self.n = n
+        self.d = d
+        self.k_min = k_min
+        self.items_by_port = items_by_port
+        # Goods that can't be resold at a profit anywhere are never bought
+        self.candidates = [
+            [k for k, worth in enumerate(profitable[i]) if worth]
+            for i in range(n)
+        ]
+
+        # Current state
+        self.port = 0
+        self.t_max = t_max
+        self.c_max = c_max
+        self.k_0 = k_0
+        self.cargo: List[Merchandise] = []
+        self.sold_at: List[int] = []       # port where cargo[i] was sold, -1 if on board
+        self.ports_visited = [False] * n
+        self.ports_visited[0] = True
+        self.route = [0]
+
+        self.best = k_0
+        self.best_route = [0]
+        self.best_purchases: List[List[int]] = [[]]
+        # Trades of every stop of best_route, with the original port indices
+        self.best_sold: List[List[Merchandise]] = [[]]
+        self.best_bought: List[List[Merchandise]] = [[]]
+        self.nodes = 0
+        self.stack = [(BUY, 0)]
+
+    @property
+    def done(self) -> bool:
+        return not self.stack
+
+    def run(self, max_steps: Optional[int] = None) -> bool:
+        """
+        Processes up to max_steps frames (all of them if None).
+        Returns True when the whole search space has been explored.
+        """
+        stack, d, items_by_port = self.stack, self.d, self.items_by_port
+        steps = 0
+
+        while stack and (max_steps is None or steps < max_steps):
+            frame = stack.pop()
+            op = frame[0]
+            steps += 1
+
+            if op == SELL:
+                j = frame[1]
+                while j < len(self.cargo) and self.sold_at[j] >= 0:
+                    j += 1
+
+                if j == len(self.cargo):
+                    stack.append((BUY, 0))
+                    continue
+
+                m = self.cargo[j]
+                sell_price = items_by_port[self.port][m.k].sell_price
+                # Keep it (explored after the sale is undone)
+                stack.append((SELL, j + 1))
+                if sell_price > -float('inf'):
+                    stack.append((UNDO_SELL, j, self.c_max, self.k_0))
+                    self.sold_at[j] = self.port
+                    self.c_max += m.w
+                    self.k_0 += sell_price
+                    stack.append((SELL, j + 1))
+
+            elif op == BUY:
+                j = frame[1]
+                if self.k_min > self.k_0:
+                    continue
+
+                candidates = self.candidates[self.port]
+                if j == len(candidates):
+                    stack.append((TRAVEL,))
+                    continue
+
+                k = candidates[j]
+                current_item = items_by_port[self.port][k]
+                funds = self.k_0 - current_item.buy_price
+                capacity_left = self.c_max - current_item.w
+
+                # Skip it (explored after the purchase is undone)
+                stack.append((BUY, j + 1))
+                if self.k_min <= funds and capacity_left >= 0:
+                    stack.append((UNDO_BUY, self.c_max, self.k_0))
+                    self.cargo.append(Merchandise(
+                        i=self.port, k=k, w=current_item.w,
+                        buy_price=current_item.buy_price
+                    ))
+                    self.sold_at.append(-1)
+                    self.c_max = capacity_left
+                    self.k_0 = funds
+                    stack.append((BUY, j + 1))
+
+            elif op == TRAVEL:
+                self.nodes += 1
+                stack.append((UNDO_DEPART, self.k_0))
+                self.k_0 -= self.k_min
+                port, t_max = self.port, self.t_max
+
+                # Back to Amsterdam: sell everything on board
+                if port != 0 and t_max >= d[port][0]:
+                    final_gain = self.k_0 + sum([
+                        items_by_port[0][m.k].sell_price
+                        for m, sold_at in zip(self.cargo, self.sold_at) if sold_at < 0
+                    ])
+                    if final_gain > self.best:
+                        self.record_best(final_gain)
+
+                # Pushed in reverse so ports are explored in index order
+                for i in range(self.n - 1, 0, -1):
+                    if not self.ports_visited[i] and t_max >= d[port][i] + d[i][0]:
+                        stack.append((ARRIVE, i))
+
+            elif op == ARRIVE:
+                i = frame[1]
+                stack.append((UNDO_ARRIVE, self.port, self.t_max))
+                self.t_max -= d[self.port][i]
+                self.port = i
+                self.ports_visited[i] = True
+                self.route.append(i)
+                stack.append((SELL, 0))
+
+            elif op == UNDO_SELL:
+                _, j, self.c_max, self.k_0 = frame
+                self.sold_at[j] = -1
+
+            elif op == UNDO_BUY:
+                _, self.c_max, self.k_0 = frame
+                self.cargo.pop()
+                self.sold_at.pop()
+
+            elif op == UNDO_DEPART:
+                self.k_0 = frame[1]
+
+            elif op == UNDO_ARRIVE:
+                self.ports_visited[self.port] = False
+                self.route.pop()
+                _, self.port, self.t_max = frame
+
+        return not stack
+
+    def record_best(self, capital: float) -> None:
+        """Stores the current route, ended in Amsterdam, as the incumbent."""
+        self.best = capital
+        self.best_route = [self.ports[i] for i in self.route] + [0]
+        # Every port is visited once, so the goods bought at each stop are
+        # the cargo (sold or not) grouped by the port it was bought at
+        position = {port: idx for idx, port in enumerate(self.route)}
+        self.best_purchases = [[] for _ in self.best_route]
+        self.best_sold = [[] for _ in self.best_route]
+        self.best_bought = [[] for _ in self.best_route]
+        for m, sold_at in zip(self.cargo, self.sold_at):
+            original = m._replace(i=self.ports[m.i])
+            self.best_purchases[position[m.i]].append(m.k)
+            self.best_bought[position[m.i]].append(original)
+            if sold_at >= 0:
+                self.best_sold[position[sold_at]].append(original)
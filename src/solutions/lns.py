@@ -0,0 +1,401 @@
+import math
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from utils import Item
+from spread import SpreadIndex
+from reachability import Reachability, select_ports
+from solution import Solution, build_solution
+from bounds import optimality_gap, port_gain, upper_bound
+from efficient import Annealer
+from route_trades import Plan, RouteTrades, TradePlan
+from batch import RouteBatch, pad_routes
+from instance import Instance
+
+# Iterations of the search when no limit is given
+ITERATIONS = 300
+# Most ports removed by a destroy operator
+MAX_REMOVED = 4
+# Iterations between two updates of the operator weights
+SEGMENT = 50
+# Share of the last segment in the new weight of an operator
+REACTION = 0.2
+# Score of an operator when its move finds a new best, improves the current
+# route or is only accepted
+SCORE_BEST = 33.0
+SCORE_BETTER = 9.0
+SCORE_ACCEPTED = 13.0
+# Insertions evaluated exactly at every step of the value insertion
+INSERTION_SAMPLE = 4
+# Starting temperature as a fraction of the starting capital, and its cooling
+START_TEMPERATURE = 0.05
+COOLING_RATE = 0.99
+
+class LargeNeighborhoodSearch:
+    """
+    Adaptive large neighborhood search over the routes of an instance.
+
+    Every move destroys part of the current route (random ports, the ports
+    that earn the least with the current trades, or a whole segment) and
+    repairs it by inserting ports again (cheapest detour for their potential,
+    best value among the insertions with the best greedy trades, or at
+    random). The trades of every route are not a heuristic: evaluate finds
+    the best ones for the route with route_trades.RouteTrades. Operators are
+    drawn with weights that follow how often their moves are accepted or
+    improve, and moves are accepted as in simulated annealing.
+    """
+
+    def __init__(self, n: int, d: List[List[float]], t_max: float,
+                 c_max: float, k_0: float, k_min: float,
+                 items_by_port: List[List[Item]]):
+        self.ports = Reachability(d, t_max).useful
+        n, d, items_by_port = select_ports(self.ports, d, items_by_port)
+        self.n = n
+        self.d = d
+        self.t_max = t_max
+        self.c_max = c_max
+        self.k_0 = k_0
+        self.k_min = k_min
+        self.items_by_port = items_by_port
+        self.route_trades = RouteTrades(c_max, k_0, k_min, items_by_port)
+        self.batch = RouteBatch(Instance.from_solve_args(
+            n, d, t_max, c_max, k_0, k_min, items_by_port
+        ))
+        self.evaluations = 0
+        self._cache: Dict[Tuple[int, ...], Optional[TradePlan]] = {}
+
+        spread = SpreadIndex.from_solve_args(
+            n, d, t_max, c_max, k_0, k_min, items_by_port
+        )
+        # What a port can add to a route, buying or selling a full hold
+        best_sale = spread.ratio.max(axis=(0, 2)).tolist()
+        self.potential = [
+            max(port_gain(c_max, items_by_port, spread, i), c_max * best_sale[i])
+            - k_min
+            for i in range(n)
+        ]
+
+        self.destroy_operators: List[Callable[[List[int], int, random.Random], List[int]]] = [
+            self.random_removal, self.worst_removal, self.segment_removal
+        ]
+        self.repair_operators: List[Callable[[List[int], random.Random], List[int]]] = [
+            self.greedy_insertion, self.value_insertion, self.random_insertion
+        ]
+        self.destroy_weights = [1.0] * len(self.destroy_operators)
+        self.repair_weights = [1.0] * len(self.repair_operators)
+
+    def initial_route(self) -> List[int]:
+        """Route of the greedy construction of efficient.py."""
+        route = Annealer(
+            self.n, self.d, self.t_max, self.c_max, self.k_0, self.k_min,
+            self.items_by_port
+        ).greedy_initial_solution().route
+        return route if len(route) > 1 else [0, 0]
+
+    def feasible(self, route: List[int]) -> bool:
+        """Every port, Amsterdam at the end included, still leaves time to get back."""
+        d, t_left = self.d, self.t_max
+        for a, b in zip(route, route[1:]):
+            if t_left < d[a][b] + d[b][0]:
+                return False
+            t_left -= d[a][b]
+        return True
+
+    def evaluate(self, route: List[int]) -> Optional[TradePlan]:
+        """
+        Best final capital of a route from Amsterdam back to Amsterdam and the
+        trades that reach it, None if the route isn't feasible. Cached.
+        """
+        key = tuple(route)
+        if key in self._cache:
+            return self._cache[key]
+
+        evaluation = None
+        if route == [0, 0]:
+            # Staying in Amsterdam
+            evaluation = TradePlan(self.k_0, [((), ())])
+        elif self.feasible(route):
+            self.evaluations += 1
+            evaluation = self.route_trades.best(route)
+        self._cache[key] = evaluation
+        return evaluation
+
+    def search(self, route: List[int], max_iter: Optional[int],
+               deadline: Optional[float] = None,
+               rng: random.Random = random) -> Tuple[List[int], TradePlan, int]:
+        """
+        Improves route until max_iter iterations or deadline (time.time()),
+        whichever comes first; one of them must be given. Returns the best
+        route, its evaluation and the iterations made.
+        """
+        if self.evaluate(route) is None:
+            route = [0, 0]
+        current, current_value = route, self.evaluate(route).capital
+        best, best_evaluation = route, self.evaluate(route)
+        temperature = START_TEMPERATURE * max(abs(current_value), 1.0)
+
+        destroy_scores = [0.0] * len(self.destroy_operators)
+        repair_scores = [0.0] * len(self.repair_operators)
+        destroy_uses = [0] * len(self.destroy_operators)
+        repair_uses = [0] * len(self.repair_operators)
+
+        iteration = 0
+        while max_iter is None or iteration < max_iter:
+            if deadline is not None and time.time() >= deadline:
+                break
+            iteration += 1
+
+            a = _roulette(self.destroy_weights, rng)
+            b = _roulette(self.repair_weights, rng)
+            removed = rng.randint(1, MAX_REMOVED)
+            candidate = self.repair_operators[b](
+                self.destroy_operators[a](current, removed, rng), rng
+            )
+            destroy_uses[a] += 1
+            repair_uses[b] += 1
+
+            evaluation = self.evaluate(candidate)
+            if evaluation is not None and candidate != current:
+                delta = evaluation.capital - current_value
+                score = 0.0
+                if evaluation.capital > best_evaluation.capital:
+                    best, best_evaluation = candidate, evaluation
+                    score = SCORE_BEST
+                elif delta > 0:
+                    score = SCORE_BETTER
+                elif rng.random() < math.exp(delta / temperature):
+                    score = SCORE_ACCEPTED
+
+                if score > 0:
+                    current, current_value = candidate, evaluation.capital
+                destroy_scores[a] += score
+                repair_scores[b] += score
+
+            temperature *= COOLING_RATE
+            if iteration % SEGMENT == 0:
+                _update_weights(self.destroy_weights, destroy_scores, destroy_uses)
+                _update_weights(self.repair_weights, repair_scores, repair_uses)
+
+        return best, best_evaluation, iteration
+
+    # Destroy operators: route without some of its ports
+
+    def random_removal(self, route: List[int], removed: int,
+                       rng: random.Random) -> List[int]:
+        inner = route[1:-1]
+        for _ in range(min(removed, len(inner))):
+            inner.pop(rng.randrange(len(inner)))
+        return [0] + inner + [0]
+
+    def worst_removal(self, route: List[int], removed: int,
+                      rng: random.Random) -> List[int]:
+        """Removes the ports where the current trades earn the least."""
+        evaluation = self.evaluate(route)
+        if evaluation is None or len(route) <= 3:
+            return self.random_removal(route, removed, rng)
+
+        earnings = self._stop_earnings(route, evaluation.plan)
+        worth = sorted(
+            range(1, len(route) - 1), key=lambda idx: earnings[idx] + rng.random()
+        )
+        dropped = set(worth[:removed])
+        return [p for idx, p in enumerate(route) if idx not in dropped]
+
+    def segment_removal(self, route: List[int], removed: int,
+                        rng: random.Random) -> List[int]:
+        """Frees a whole stretch of the route, with the cargo carried along it."""
+        inner = len(route) - 2
+        if inner == 0:
+            return route
+        length = min(removed, inner)
+        start = rng.randint(1, inner - length + 1)
+        return route[:start] + route[start + length:]
+
+    def _stop_earnings(self, route: List[int], plan: Plan) -> List[float]:
+        # Margin of every good split between the stops where it is bought and
+        # sold, goods of the same type and weight taken first in, first out
+        items_by_port = self.items_by_port
+        earnings = [0.0] * len(route)
+        on_board: List[Tuple[int, int, float]] = []
+        for idx, (kept, bought) in enumerate(plan + [((), ())]):
+            port = route[idx]
+            remaining = list(kept)
+            still: List[Tuple[int, int, float]] = []
+            for origin, k, w in on_board:
+                if (k, w) in remaining:
+                    remaining.remove((k, w))
+                    still.append((origin, k, w))
+                    continue
+                margin = (items_by_port[port][k].sell_price
+                          - items_by_port[route[origin]][k].buy_price)
+                earnings[origin] += margin / 2
+                earnings[idx] += margin / 2
+            on_board = still + [(idx, k, w) for k, w in bought]
+        return earnings
+
+    # Repair operators: route with ports inserted again, always feasible
+
+    def greedy_insertion(self, route: List[int], rng: random.Random) -> List[int]:
+        """Inserts the ports with the best potential per unit of detour."""
+        route = list(route)
+        while True:
+            choices = []
+            for port, position, detour in self._insertions(route):
+                if self.potential[port] > 0:
+                    noise = rng.uniform(0.8, 1.2)
+                    # Without the triangle inequality a detour can be a
+                    # shortcut, and detour + 1 can be zero or negative
+                    cost = max(detour, 0.0) + 1.0
+                    choices.append((self.potential[port] * noise / cost,
+                                    port, position))
+            if not choices:
+                return route
+            _, port, position = max(choices)
+            route.insert(position, port)
+
+    def value_insertion(self, route: List[int], rng: random.Random) -> List[int]:
+        """
+        Inserts, while it pays, the best port and position among the
+        INSERTION_SAMPLE insertions with the best greedy trades, all of them
+        scored at once by batch.RouteBatch, comparing their best trades.
+        """
+        route = list(route)
+        value = self.evaluate(route)
+        value = value.capital if value is not None else -math.inf
+        while True:
+            candidates = [
+                route[:position] + [port] + route[position:]
+                for port, position, _ in self._insertions(route)
+            ]
+            if not candidates:
+                return route
+
+            promising = list(range(len(candidates)))
+            if len(candidates) > INSERTION_SAMPLE:
+                scores = self.batch.evaluate(pad_routes(candidates)).capital.tolist()
+                promising = sorted(
+                    promising, key=lambda idx: (-scores[idx], rng.random())
+                )[:INSERTION_SAMPLE]
+            best_route = None
+            for idx in promising:
+                evaluation = self.evaluate(candidates[idx])
+                if evaluation is not None and evaluation.capital > value:
+                    best_route, value = candidates[idx], evaluation.capital
+            if best_route is None:
+                return route
+            route = best_route
+
+    def random_insertion(self, route: List[int], rng: random.Random) -> List[int]:
+        route = list(route)
+        for _ in range(rng.randint(1, MAX_REMOVED)):
+            insertions = list(self._insertions(route))
+            if not insertions:
+                break
+            port, position, _ = rng.choice(insertions)
+            route.insert(position, port)
+        return route
+
+    def _insertions(self, route: List[int]) -> Iterator[Tuple[int, int, float]]:
+        # (port, position, extra time) of every feasible insertion
+        d = self.d
+        on_route = set(route)
+        elapsed = [0.0]
+        for a, b in zip(route, route[1:]):
+            elapsed.append(elapsed[-1] + d[a][b])
+
+        for port in range(1, self.n):
+            if port in on_route:
+                continue
+            for position in range(1, len(route)):
+                a, b = route[position - 1], route[position]
+                detour = d[a][port] + d[port][b] - d[a][b]
+                if elapsed[-1] + detour > self.t_max:
+                    continue
+                candidate = route[:position] + [port] + route[position:]
+                if self.feasible(candidate):
+                    yield port, position, detour
+
+
+def solve(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i for each port i
+    max_iter: Optional[int] = None,
+    time_budget: Optional[float] = None   # seconds
+) -> float:
+    """
+    Final capital of the best route found by LargeNeighborhoodSearch from the
+    greedy route of efficient.py. Without limits it makes ITERATIONS moves.
+    """
+    return solve_detailed(
+        n, d, t_max, c_max, k_0, k_min, items_by_port, max_iter, time_budget
+    ).capital
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i for each port i
+    max_iter: Optional[int] = None,
+    time_budget: Optional[float] = None   # seconds
+) -> Solution:
+    """
+    Same search as solve, with the route and its best trades. The statistics
+    include the routes evaluated, an upper bound of the optimum
+    (bounds.upper_bound) and the relative gap to it.
+    """
+    start = time.time()
+    lns = LargeNeighborhoodSearch(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    if max_iter is None and time_budget is None:
+        max_iter = ITERATIONS
+    deadline = None if time_budget is None else start + time_budget
+
+    route, evaluation, iterations = [0, 0], TradePlan(k_0, [((), ())]), 0
+    if lns.n > 1:
+        route, evaluation, iterations = lns.search(
+            lns.initial_route(), max_iter, deadline
+        )
+
+    stats = {
+        'iterations': iterations, 'evaluations': lns.evaluations,
+        'elapsed': time.time() - start
+    }
+    if evaluation.capital <= k_0 or route == [0, 0]:
+        solution = build_solution(d, k_0, k_min, items_by_port, [0], [[]], [[]], stats)
+    else:
+        sold, bought = lns.route_trades.merchandise(
+            route, evaluation.plan, lns.ports
+        )
+        solution = build_solution(
+            d, k_0, k_min, items_by_port, [lns.ports[p] for p in route],
+            sold, bought, stats
+        )
+
+    stats['upper_bound'] = upper_bound(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    stats['gap'] = optimality_gap(solution.capital, stats['upper_bound'])
+    return solution
+
+def _roulette(weights: List[float], rng: random.Random) -> int:
+    pick = rng.random() * sum(weights)
+    for idx, weight in enumerate(weights):
+        pick -= weight
+        if pick < 0:
+            return idx
+    return len(weights) - 1
+
+def _update_weights(weights: List[float], scores: List[float],
+                    uses: List[int]) -> None:
+    for idx, used in enumerate(uses):
+        if used:
+            weights[idx] = ((1 - REACTION) * weights[idx]
+                            + REACTION * scores[idx] / used)
+        # Operators keep a chance of being drawn
+        weights[idx] = max(weights[idx], 0.05)
+        scores[idx], uses[idx] = 0.0, 0
@@ -4,6 +4,11 @@ from utils import Item
 # from brute_force_CHP import solve
 from brute_force_JAT import solve
 # from efficient import solve
+# from bitmask_dp import solve
+# from iterative_search import solve
+# from anytime import solve
+# from milp import solve
+# from lns import solve
 
 n: int = 3
 d: List[List[float]] = [
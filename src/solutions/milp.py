@@ -0,0 +1,586 @@
+import time
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+from utils import Item, Merchandise
+from spread import SpreadIndex
+from reachability import EPS, Reachability, select_ports
+from solution import Solution, build_solution
+
+# Names of the solver backends, tried in this order when none is given
+BACKENDS = ('highspy', 'scipy')
+# Terms per line in LP files, which some readers limit in length
+TERMS_PER_LINE = 8
+
+
+class Model:
+    """
+    Mixed integer linear program to be maximized. Variables are referred to by
+    their position; constraints are lhs `sense` rhs with sense '<=', '>=' or '='
+    and lhs a {variable: coefficient} dict.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.names: List[str] = []
+        self.lower: List[float] = []
+        self.upper: List[float] = []
+        self.integer: List[bool] = []
+        self.index: Dict[str, int] = {}
+        self.objective: Dict[int, float] = {}
+        self.offset = 0.0
+        self.rows: List[Tuple[str, Dict[int, float], str, float]] = []
+
+    def add_var(self, name: str, lower: float = 0.0, upper: float = float('inf'),
+                integer: bool = False) -> int:
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.lower.append(lower)
+        self.upper.append(upper)
+        self.integer.append(integer)
+        return self.index[name]
+
+    def add_binary(self, name: str) -> int:
+        return self.add_var(name, 0.0, 1.0, True)
+
+    def add_constraint(self, name: str, terms: Dict[int, float],
+                       sense: str, rhs: float) -> None:
+        self.rows.append((name, terms, sense, rhs))
+
+    def value(self, x: Sequence[float]) -> float:
+        return self.offset + sum(c * x[v] for v, c in self.objective.items())
+
+    def violations(self, x: Sequence[float], tol: float = 1e-6) -> List[str]:
+        """Names of the bounds and constraints that x doesn't satisfy."""
+        wrong = [
+            name for name, value, lower, upper in zip(
+                self.names, x, self.lower, self.upper
+            )
+            if value < lower - tol or value > upper + tol
+        ]
+        for name, terms, sense, rhs in self.rows:
+            lhs = sum(c * x[v] for v, c in terms.items())
+            if ((sense == '<=' and lhs > rhs + tol)
+                    or (sense == '>=' and lhs < rhs - tol)
+                    or (sense == '=' and abs(lhs - rhs) > tol)):
+                wrong.append(name)
+
+        return wrong
+
+
+def build_model(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> Tuple[Model, List[int]]:
+    """
+    Routing and inventory model of the instance. Returns the model and the
+    index in the original instance of every port in it (ports that can't be
+    part of any route within t_max are left out).
+
+    Variables:
+      x_a_b     1 if the route sails from port a to port b
+      y_a       1 if port a (not Amsterdam) is visited
+      leave     1 if the ship leaves Amsterdam at all
+      t_a       arrival time at port a
+      buy_i_k   1 if good k is bought at port i
+      sell_i_k_a  1 if the good k bought at i is sold at port a (Amsterdam
+                is the last port, so a = 0 is the final sale)
+      h_i_k_a_b 1 if the good k bought at i is on board from a to b
+      g_a_b     capital when leaving a for b, after trading, before K_min
+
+    Subtours are eliminated with arrival times (MTZ style), which assumes
+    positive distances between different ports. Every arrival time has a
+    window that keeps the big-M small: no earlier than the shortest path
+    from Amsterdam, and no later than what leaves time to sail straight
+    back, d[a][0], the rule of the other solvers (with a distance matrix
+    without the triangle inequality a shorter path back through other ports
+    doesn't count). Only goods with a profitable destination are considered
+    for purchase, as in the exact solvers.
+    """
+    reach = Reachability(d, t_max)
+    ports = reach.useful
+    n, d, items_by_port = select_ports(ports, d, items_by_port)
+    reach = Reachability(d, t_max)
+    sp = reach.sp
+    spread = SpreadIndex.from_solve_args(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    )
+    m = len(items_by_port[0]) if items_by_port else 0
+    model = Model('dutch_merchant')
+
+    # Ports that can be reached and still leave time to sail straight back,
+    # and arcs between them that fit in a route from Amsterdam
+    routable = [sp[0][a] + d[a][0] <= t_max + EPS for a in range(n)]
+    arcs = [
+        (a, b) for a in range(n) for b in range(n)
+        if a != b and routable[a] and sp[0][a] + d[a][b] + d[b][0] <= t_max + EPS
+    ]
+    out_arcs: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    in_arcs: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    for a, b in arcs:
+        out_arcs[a].append((a, b))
+        in_arcs[b].append((a, b))
+
+    goods = [
+        (i, k) for i in range(n) for k in range(m) if spread.profitable_items[i][k]
+    ]
+    # Capital only grows by selling, each good at most at its best spread
+    capital_cap = k_0 + sum(spread.best_spread_items[i][k] for i, k in goods)
+
+    x = {arc: model.add_binary('x_%d_%d' % arc) for arc in arcs}
+    leave = model.add_binary('leave')
+    y = {a: model.add_binary('y_%d' % a) for a in range(1, n)}
+    # A port can't be reached sooner than its shortest path allows, nor
+    # later than what leaves time to sail straight back to Amsterdam (ports
+    # that aren't routable have no arcs, their window is a single point)
+    earliest = [sp[0][a] for a in range(n)]
+    latest = [t_max - d[a][0] if routable[a] else earliest[a] for a in range(n)]
+    arrival = {
+        a: model.add_var('t_%d' % a, earliest[a], latest[a]) for a in range(1, n)
+    }
+    g = {arc: model.add_var('g_%d_%d' % arc, 0.0, capital_cap) for arc in arcs}
+
+    # Route: Amsterdam is left and reached at most once, other ports once
+    model.add_constraint(
+        'leave_0', {x[arc]: 1.0 for arc in out_arcs[0]} | {leave: -1.0}, '=', 0.0
+    )
+    model.add_constraint(
+        'return_0', {x[arc]: 1.0 for arc in in_arcs[0]} | {leave: -1.0}, '=', 0.0
+    )
+    for a in range(1, n):
+        model.add_constraint(
+            'out_%d' % a, {x[arc]: 1.0 for arc in out_arcs[a]} | {y[a]: -1.0},
+            '=', 0.0
+        )
+        model.add_constraint(
+            'in_%d' % a, {x[arc]: 1.0 for arc in in_arcs[a]} | {y[a]: -1.0},
+            '=', 0.0
+        )
+
+    # Arrival times, which also rule out subtours; the deadline is already
+    # the upper bound of every arrival time. The big-M of every arc is the
+    # smallest one that the time windows allow
+    for a, b in arcs:
+        if b == 0:
+            continue
+        start = latest[a] if a != 0 else 0.0
+
+        big_m = start + d[a][b] - earliest[b]
+        terms = {arrival[b]: 1.0, x[a, b]: -big_m}
+        if a != 0:
+            terms[arrival[a]] = -1.0
+        model.add_constraint('time_%d_%d' % (a, b), terms, '>=', d[a][b] - big_m)
+
+    # No route goes back and forth between two ports
+    for a, b in arcs:
+        if 0 < a < b and (b, a) in x:
+            model.add_constraint(
+                'cycle_%d_%d' % (a, b), {x[a, b]: 1.0, x[b, a]: 1.0, y[a]: -1.0},
+                '<=', 0.0
+            )
+
+    # Goods: bought at most once, carried along the route until sold
+    buy: Dict[Tuple[int, int], int] = {}
+    sell: Dict[Tuple[int, int, int], int] = {}
+    carry: Dict[Tuple[int, int, int, int], int] = {}
+    for i, k in goods:
+        buy[i, k] = model.add_binary('buy_%d_%d' % (i, k))
+        for a in range(n):
+            if (a != i or a == 0) and items_by_port[a][k].sell_price > -float('inf'):
+                sell[i, k, a] = model.add_binary('sell_%d_%d_%d' % (i, k, a))
+        for a, b in arcs:
+            # Nothing bought at i comes back to i, except to Amsterdam at the end
+            if b == i and i != 0:
+                continue
+            if b == 0 and (i, k, 0) not in sell:
+                continue
+            h = model.add_var('h_%d_%d_%d_%d' % (i, k, a, b), 0.0, 1.0)
+            carry[i, k, a, b] = h
+            model.add_constraint(
+                'carry_%d_%d_%d_%d' % (i, k, a, b), {h: 1.0, x[a, b]: -1.0},
+                '<=', 0.0
+            )
+
+        for a in range(n):
+            inflow = {
+                carry[i, k, c, b]: 1.0 for c, b in in_arcs[a]
+                if (i, k, c, b) in carry
+            }
+            outflow = {
+                carry[i, k, a, b]: -1.0 for _, b in out_arcs[a]
+                if (i, k, a, b) in carry
+            }
+            terms = inflow | outflow
+            if (i, k, a) in sell:
+                terms[sell[i, k, a]] = -1.0
+            if a == i:
+                terms[buy[i, k]] = 1.0
+            if a == 0:
+                # Leaving Amsterdam and coming back are separate events
+                model.add_constraint(
+                    'start_%d_%d' % (i, k),
+                    outflow | ({buy[i, k]: 1.0} if i == 0 else {}), '=', 0.0
+                )
+                if (i, k, 0) in sell:
+                    model.add_constraint(
+                        'end_%d_%d' % (i, k), inflow | {sell[i, k, 0]: -1.0},
+                        '=', 0.0
+                    )
+            else:
+                model.add_constraint('goods_%d_%d_%d' % (i, k, a), terms, '=', 0.0)
+
+    # Capacity on every leg
+    for a, b in arcs:
+        terms = {
+            carry[i, k, a, b]: items_by_port[i][k].w
+            for i, k in goods if (i, k, a, b) in carry
+        }
+        terms[x[a, b]] = -c_max
+        model.add_constraint('capacity_%d_%d' % (a, b), terms, '<=', 0.0)
+
+    # Capital: enough for K_min on every departure, balanced at every port
+    for a, b in arcs:
+        model.add_constraint(
+            'capital_min_%d_%d' % (a, b), {g[a, b]: 1.0, x[a, b]: -k_min},
+            '>=', 0.0
+        )
+        model.add_constraint(
+            'capital_max_%d_%d' % (a, b), {g[a, b]: 1.0, x[a, b]: -capital_cap},
+            '<=', 0.0
+        )
+
+    def trades(a: int) -> Dict[int, float]:
+        terms: Dict[int, float] = {}
+        for (i, k, port), v in sell.items():
+            if port == a:
+                terms[v] = items_by_port[a][k].sell_price
+        for (i, k), v in buy.items():
+            if i == a:
+                terms[v] = -items_by_port[a][k].buy_price
+        return terms
+
+    for a in range(1, n):
+        terms = {g[arc]: 1.0 for arc in out_arcs[a]}
+        terms.update({g[arc]: -1.0 for arc in in_arcs[a]})
+        terms[y[a]] = k_min
+        for v, price in trades(a).items():
+            terms[v] = -price
+        model.add_constraint('capital_%d' % a, terms, '=', 0.0)
+
+    start = {g[arc]: 1.0 for arc in out_arcs[0]}
+    start[leave] = -k_0
+    for (i, k), v in buy.items():
+        if i == 0:
+            start[v] = items_by_port[0][k].buy_price
+    model.add_constraint('capital_0', start, '=', 0.0)
+    # Goods bought in Amsterdam only if the ship leaves
+    for (i, k), v in buy.items():
+        if i == 0:
+            model.add_constraint('buy_leave_%d' % k, {v: 1.0, leave: -1.0}, '<=', 0.0)
+
+    # Final capital: last departure minus K_min, plus the final sales; K_0
+    # if the ship stays in Amsterdam
+    model.offset = k_0
+    model.objective = {g[arc]: 1.0 for arc in in_arcs[0]}
+    model.objective[leave] = -k_0 - k_min
+    for (i, k, a), v in sell.items():
+        if a == 0:
+            model.objective[v] = items_by_port[0][k].sell_price
+
+    return model, ports
+
+def write_lp(model: Model, out: TextIO) -> None:
+    """Writes the model in CPLEX LP format."""
+    def expression(terms: Dict[int, float]) -> List[str]:
+        tokens = [
+            '%s %r %s' % ('-' if c < 0 else '+', abs(c), model.names[v])
+            for v, c in terms.items() if c != 0
+        ]
+        return [
+            ' '.join(tokens[start:start + TERMS_PER_LINE])
+            for start in range(0, len(tokens), TERMS_PER_LINE)
+        ] or ['0 %s' % model.names[0]]
+
+    out.write('\\ %s\nMaximize\n obj:' % model.name)
+    objective = expression(model.objective)
+    if model.offset:
+        objective[-1] += ' %s %r' % ('-' if model.offset < 0 else '+', abs(model.offset))
+    out.write('\n   '.join([''] + objective)[1:] + '\n')
+
+    out.write('Subject To\n')
+    for name, terms, sense, rhs in model.rows:
+        lines = expression(terms)
+        lines[-1] += ' %s %r' % (sense, rhs)
+        out.write(' %s: ' % name + '\n   '.join(lines) + '\n')
+
+    out.write('Bounds\n')
+    for name, lower, upper, integer in zip(
+        model.names, model.lower, model.upper, model.integer
+    ):
+        if integer and lower == 0 and upper == 1:
+            continue
+        if lower == -float('inf') and upper == float('inf'):
+            out.write(' %s free\n' % name)
+        else:
+            out.write(' %s <= %s <= %s\n' % (
+                _lp_number(lower), name, _lp_number(upper)
+            ))
+
+    binaries = [
+        name for name, lower, upper, integer in zip(
+            model.names, model.lower, model.upper, model.integer
+        )
+        if integer and lower == 0 and upper == 1
+    ]
+    generals = [
+        name for name, lower, upper, integer in zip(
+            model.names, model.lower, model.upper, model.integer
+        )
+        if integer and not (lower == 0 and upper == 1)
+    ]
+    for section, names in (('Binaries', binaries), ('Generals', generals)):
+        if names:
+            out.write(section + '\n')
+            for start in range(0, len(names), TERMS_PER_LINE):
+                out.write(' ' + ' '.join(names[start:start + TERMS_PER_LINE]) + '\n')
+    out.write('End\n')
+
+def write_mps(model: Model, out: TextIO) -> None:
+    """Writes the model in free MPS format (names without spaces)."""
+    senses = {'<=': 'L', '>=': 'G', '=': 'E'}
+    columns: List[List[Tuple[str, float]]] = [[] for _ in model.names]
+    for v, c in model.objective.items():
+        columns[v].append(('obj', c))
+    for name, terms, _, _ in model.rows:
+        for v, c in terms.items():
+            columns[v].append((name, c))
+
+    out.write('NAME %s\nOBJSENSE\n    MAX\nROWS\n N obj\n' % model.name)
+    for name, _, sense, _ in model.rows:
+        out.write(' %s %s\n' % (senses[sense], name))
+
+    out.write('COLUMNS\n')
+    in_integers = False
+    for v, entries in enumerate(columns):
+        if model.integer[v] != in_integers:
+            in_integers = model.integer[v]
+            out.write("    MARKER 'MARKER' '%s'\n" % ('INTORG' if in_integers else 'INTEND'))
+        for row, c in entries:
+            out.write('    %s %s %r\n' % (model.names[v], row, c))
+    if in_integers:
+        out.write("    MARKER 'MARKER' 'INTEND'\n")
+
+    out.write('RHS\n')
+    if model.offset:
+        # The objective constant is minus the right-hand side of its row
+        out.write('    RHS obj %r\n' % -model.offset)
+    for name, _, _, rhs in model.rows:
+        if rhs:
+            out.write('    RHS %s %r\n' % (name, rhs))
+
+    out.write('BOUNDS\n')
+    for name, lower, upper, integer in zip(
+        model.names, model.lower, model.upper, model.integer
+    ):
+        if integer and lower == 0 and upper == 1:
+            out.write(' BV BND %s\n' % name)
+            continue
+        if lower == upper:
+            out.write(' FX BND %s %r\n' % (name, lower))
+            continue
+        if lower == -float('inf'):
+            out.write(' MI BND %s\n' % name)
+        elif lower != 0:
+            out.write(' LO BND %s %r\n' % (name, lower))
+        if upper != float('inf'):
+            out.write(' UP BND %s %r\n' % (name, upper))
+    out.write('ENDATA\n')
+
+def solve_model(
+    model: Model, backend: Optional[str] = None,
+    time_limit: Optional[float] = None
+) -> Optional[List[float]]:
+    """
+    Solves the model with the first backend in BACKENDS that is installed, or
+    with the given one. Returns the values of the variables, None if no
+    feasible solution was found. Raises ImportError if no backend is available.
+    """
+    for name in (backend,) if backend is not None else BACKENDS:
+        try:
+            if name == 'highspy':
+                return _solve_highspy(model, time_limit)
+            if name == 'scipy':
+                return _solve_scipy(model, time_limit)
+        except ImportError:
+            if backend is not None:
+                raise
+            continue
+        raise ValueError(f"Unknown backend: {name!r}")
+
+    raise ImportError(
+        'No MILP solver available, install one of: ' + ', '.join(BACKENDS)
+    )
+
+def solve(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]]       # M_i for each port i
+) -> float:
+    return solve_detailed(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    ).capital
+
+def solve_detailed(
+    n: int,
+    d: List[List[float]],                 # d[i][j] = d_{ij}
+    t_max: float,                         # T_max
+    c_max: float,                         # C_max
+    k_0: float,                           # K_0
+    k_min: float,                         # K_min
+    items_by_port: List[List[Item]],      # M_i for each port i
+    backend: Optional[str] = None,
+    time_limit: Optional[float] = None
+) -> Solution:
+    """Builds the model, solves it and reads the route and trades back."""
+    start = time.time()
+    model, ports = build_model(n, d, t_max, c_max, k_0, k_min, items_by_port)
+    x = solve_model(model, backend, time_limit)
+    stats = {
+        'variables': len(model.names), 'constraints': len(model.rows),
+        'elapsed': time.time() - start
+    }
+    if x is None:
+        return build_solution(d, k_0, k_min, items_by_port, [0], [[]], [[]], stats)
+
+    route, sold, bought = read_plan(model, ports, items_by_port, x)
+    return build_solution(d, k_0, k_min, items_by_port, route, sold, bought, stats)
+
+def read_plan(
+    model: Model, ports: List[int], items_by_port: List[List[Item]],
+    x: Sequence[float]
+) -> Tuple[List[int], List[List[Merchandise]], List[List[Merchandise]]]:
+    """
+    Route, goods sold and goods bought at every stop of a solution of the
+    model, with the original port indices.
+    """
+    chosen = {
+        name for name, value in zip(model.names, x)
+        if value > 0.5 and model.integer[model.index[name]]
+    }
+    successor = {}
+    for name in chosen:
+        if name.startswith('x_'):
+            a, b = map(int, name.split('_')[1:])
+            successor[a] = b
+
+    route = [0]
+    while route[-1] in successor and successor[route[-1]] != 0:
+        route.append(successor[route[-1]])
+    if len(route) > 1:
+        route.append(0)
+    position = {port: idx for idx, port in enumerate(route[:-1] or route)}
+
+    sold: List[List[Merchandise]] = [[] for _ in route]
+    bought: List[List[Merchandise]] = [[] for _ in route]
+    for name in chosen:
+        kind, *numbers = name.split('_')
+        if kind not in ('buy', 'sell'):
+            continue
+        i, k = numbers[0], numbers[1]
+        item = items_by_port[ports[int(i)]][int(k)]
+        good = Merchandise(ports[int(i)], int(k), item.w, item.buy_price)
+        if kind == 'buy':
+            bought[position[int(i)]].append(good)
+        elif int(numbers[2]) != 0:
+            sold[position[int(numbers[2])]].append(good)
+
+    return [ports[a] for a in route], sold, bought
+
+def _solve_highspy(model: Model, time_limit: Optional[float]) -> Optional[List[float]]:
+    import highspy
+    import numpy as np
+
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    if time_limit is not None:
+        highs.setOptionValue('time_limit', float(time_limit))
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = len(model.names)
+    lp.num_row_ = len(model.rows)
+    lp.sense_ = highspy.ObjSense.kMaximize
+    lp.offset_ = model.offset
+    lp.col_cost_ = np.array([model.objective.get(v, 0.0) for v in range(lp.num_col_)])
+    lp.col_lower_ = np.array(model.lower)
+    lp.col_upper_ = np.array(model.upper)
+    lower, upper = _row_bounds(model)
+    lp.row_lower_ = np.array(lower)
+    lp.row_upper_ = np.array(upper)
+
+    starts, indices, values = [0], [], []
+    for _, terms, _, _ in model.rows:
+        indices.extend(terms.keys())
+        values.extend(terms.values())
+        starts.append(len(indices))
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.start_ = np.array(starts)
+    lp.a_matrix_.index_ = np.array(indices)
+    lp.a_matrix_.value_ = np.array(values)
+    lp.integrality_ = [
+        highspy.HighsVarType.kInteger if integer else highspy.HighsVarType.kContinuous
+        for integer in model.integer
+    ]
+
+    highs.passModel(lp)
+    highs.run()
+    if highs.getInfo().primal_solution_status != 2:   # kSolutionStatusFeasible
+        return None
+    return list(highs.getSolution().col_value)
+
+def _solve_scipy(model: Model, time_limit: Optional[float]) -> Optional[List[float]]:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import csr_matrix
+
+    rows, cols, values = [], [], []
+    for r, (_, terms, _, _) in enumerate(model.rows):
+        for v, c in terms.items():
+            rows.append(r)
+            cols.append(v)
+            values.append(c)
+    matrix = csr_matrix(
+        (values, (rows, cols)), shape=(len(model.rows), len(model.names))
+    )
+    lower, upper = _row_bounds(model)
+    # milp minimizes
+    cost = [-model.objective.get(v, 0.0) for v in range(len(model.names))]
+
+    result = milp(
+        cost, integrality=[int(integer) for integer in model.integer],
+        bounds=Bounds(model.lower, model.upper),
+        constraints=LinearConstraint(matrix, lower, upper),
+        options={} if time_limit is None else {'time_limit': time_limit}
+    )
+    if result.x is None:
+        return None
+    return list(result.x)
+
+def _row_bounds(model: Model) -> Tuple[List[float], List[float]]:
+    lower, upper = [], []
+    for _, _, sense, rhs in model.rows:
+        lower.append(rhs if sense in ('>=', '=') else -float('inf'))
+        upper.append(rhs if sense in ('<=', '=') else float('inf'))
+    return lower, upper
+
+def _lp_number(value: float) -> str:
+    if value == float('inf'):
+        return '+inf'
+    if value == -float('inf'):
+        return '-inf'
+    return repr(value)
@@ -0,0 +1,111 @@
+import math
+from typing import Dict, List, NamedTuple, Tuple
+from utils import Item
+
+# Decimals of the weights and prices resolved exactly by the knapsack
+MAX_DECIMALS = 6
+
+
+class Purchase(NamedTuple):
+    w: float                 # weight used
+    cost: float              # money spent
+    value: float             # expected value of the goods bought
+    items: Tuple[int, ...]   # indices k of the goods bought at the port
+
+
+def purchase_frontier(
+    items_at_port: List[Item],
+    values: List[float],                  # expected value of buying item k
+    capacity: float,                      # free space in the hold
+    budget: float,                        # capital above K_min
+    scale: int = 10,                      # weight units per unit of w, at least
+    cost_scale: int = 10                  # cost units per unit of money, at least
+) -> List[Purchase]:
+    """
+    Pareto frontier of (weight used, money spent, expected value) of the
+    purchases that fit both constraints: 0/1 knapsack with two constraints
+    solved by DP over cells of integer weight w * scale and integer cost
+    buy_price * cost_scale, keeping the best value of every cell. Both
+    scales grow to powers of ten that make weights, capacity and prices
+    integers, so the result is exact. The work is O(m * W * B) with
+    W = capacity * scale and B = budget * cost_scale cells: polynomial in m
+    but pseudo-polynomial, it grows with the capacity, the budget and the
+    decimals of the numbers.
+    """
+    cells = _knapsack(items_at_port, values, capacity, budget, scale, cost_scale)
+
+    plans = sorted(
+        (Purchase(sum(items_at_port[k].w for k in bought), cost, value, bought)
+         for cost, value, bought in cells.values()),
+        key=lambda p: (p.w, p.cost, -p.value)
+    )
+    frontier: List[Purchase] = []
+    for plan in plans:
+        if not any(
+            kept.cost <= plan.cost and kept.value >= plan.value
+            for kept in frontier
+        ):
+            frontier.append(plan)
+
+    return frontier
+
+def best_purchase(
+    items_at_port: List[Item],
+    values: List[float],
+    capacity: float,
+    budget: float,
+    scale: int = 10,
+    cost_scale: int = 10
+) -> Purchase:
+    """
+    Purchase with the highest expected value that fits both constraints,
+    from the same DP as purchase_frontier.
+    """
+    cells = _knapsack(items_at_port, values, capacity, budget, scale, cost_scale)
+    cost, value, bought = max(cells.values(), key=lambda cell: cell[1])
+
+    return Purchase(sum(items_at_port[k].w for k in bought), cost, value, bought)
+
+def _exact_scale(numbers: List[float], scale: int) -> int:
+    # Smallest power of ten (times scale) that makes the numbers integers,
+    # up to MAX_DECIMALS decimals
+    numbers = [x for x in numbers if math.isfinite(x)]
+    while scale < 10 ** MAX_DECIMALS and any(
+        abs(x * scale - round(x * scale)) > 1e-9 * max(1.0, abs(x * scale))
+        for x in numbers
+    ):
+        scale *= 10
+    return scale
+
+def _knapsack(
+    items_at_port: List[Item], values: List[float],
+    capacity: float, budget: float, scale: int, cost_scale: int
+) -> Dict[Tuple[int, int], Tuple[float, float, Tuple[int, ...]]]:
+    candidates = [
+        k for k, item in enumerate(items_at_port)
+        if values[k] > 0 and item.w <= capacity and item.buy_price <= budget
+    ]
+    scale = _exact_scale(
+        [capacity] + [items_at_port[k].w for k in candidates], scale
+    )
+    cost_scale = _exact_scale(
+        [items_at_port[k].buy_price for k in candidates], cost_scale
+    )
+    max_weight = math.floor(capacity * scale + 1e-9)
+
+    # (weight, cost) cell -> (cost, value, items) with the best value
+    cells: Dict[Tuple[int, int], Tuple[float, float, Tuple[int, ...]]] = {
+        (0, 0): (0.0, 0.0, ())
+    }
+    for k in candidates:
+        item = items_at_port[k]
+        w = math.ceil(item.w * scale - 1e-9)
+        c = math.ceil(item.buy_price * cost_scale - 1e-9)
+        for (weight, units), (cost, value, bought) in list(cells.items()):
+            if weight + w > max_weight or cost + item.buy_price > budget:
+                continue
+            cell = (weight + w, units + c)
+            if cell not in cells or value + values[k] > cells[cell][1]:
+                cells[cell] = (cost + item.buy_price, value + values[k], bought + (k,))
+
+    return cells
@@ -0,0 +1,104 @@
+from bisect import bisect_right
+from typing import List, Tuple
+import numpy as np
+from utils import Item
+
+# Slack for comparing sums of distances computed in a different order
+EPS = 1e-9
+# Entries of the distance matrix relaxed together by floyd_warshall
+FLOYD_BLOCK = 32768
+
+
+class Reachability:
+    """
+    All-pairs shortest paths of d and, for every port, the other ports sorted
+    by the cheapest way of visiting them and then getting back to Amsterdam.
+    A port j can only follow port p in a route with t time left if
+    sp[p][j] + sp[j][0] <= t, whatever the ports in between are.
+    """
+
+    def __init__(self, d: List[List[float]], t_max: float):
+        n = len(d)
+        self.t_max = t_max
+        self.sp = shortest_paths(d)
+
+        self.costs: List[List[float]] = []
+        self.ports: List[List[int]] = []
+        for p in range(n):
+            detours = sorted(
+                (self.sp[p][j] + self.sp[j][0], j) for j in range(1, n) if j != p
+            )
+            self.costs.append([cost for cost, _ in detours])
+            self.ports.append([j for _, j in detours])
+
+        # Ports that appear in at least one route within t_max
+        self.useful = [0] + [
+            j for j in range(1, n) if self.sp[0][j] + self.sp[j][0] <= t_max + EPS
+        ]
+
+    def reachable(self, port: int, t_left: float) -> List[int]:
+        """Ports that can still be visited from port with a return to Amsterdam."""
+        return self.ports[port][:bisect_right(self.costs[port], t_left + EPS)]
+
+def shortest_paths(d: List[List[float]]) -> List[List[float]]:
+    """Floyd-Warshall over the distance matrix."""
+    return floyd_warshall(d).tolist()
+
+def floyd_warshall(d, tolerance: float = 0.0) -> np.ndarray:
+    """
+    All-pairs shortest paths of d (lists or an array) as a new (n, n) array.
+    A distance is only replaced by a path through k if it is longer by more
+    than tolerance.
+
+    Each k relaxes a block of rows at a time with the row and column of k,
+    blocks small enough to stay in cache. As d[k][k] is 0, the row and
+    column of k don't change during the step, so the result is the one of
+    the triple loop, bit for bit.
+    """
+    n = len(d)
+    sp = np.array(d, dtype=float).reshape(n, n)
+    rows = max(1, min(n, FLOYD_BLOCK // max(n, 1)))
+    through = np.empty((rows, n))
+    bound = np.empty((rows, n))
+    shorter = np.empty((rows, n), dtype=bool)
+    for k in range(n):
+        row_k = sp[k]
+        for start in range(0, n, rows):
+            block = sp[start:start + rows]
+            size = block.shape[0]
+            np.add(block[:, k, None], row_k, out=through[:size])
+            if tolerance:
+                np.add(through[:size], tolerance, out=bound[:size])
+                np.greater(block, bound[:size], out=shorter[:size])
+                np.copyto(block, through[:size], where=shorter[:size])
+            else:
+                np.minimum(block, through[:size], out=block)
+
+    return sp
+
+def prune_unreachable_ports(
+    n: int, d: List[List[float]], t_max: float,
+    items_by_port: List[List[Item]]
+) -> Tuple[int, List[List[float]], List[List[Item]]]:
+    """
+    Drops the ports that can't be part of any route within t_max.
+    The remaining ports keep their relative order, Amsterdam is still port 0.
+    """
+    useful = Reachability(d, t_max).useful
+    if len(useful) == n:
+        return n, d, items_by_port
+
+    return select_ports(useful, d, items_by_port)
+
+def select_ports(
+    ports: List[int], d: List[List[float]], items_by_port: List[List[Item]]
+) -> Tuple[int, List[List[float]], List[List[Item]]]:
+    """Sub-instance with only the given ports, in the given order."""
+    if ports == list(range(len(d))):
+        return len(d), d, items_by_port
+
+    return (
+        len(ports),
+        [[d[i][j] for j in ports] for i in ports],
+        [items_by_port[i] for i in ports]
+    )
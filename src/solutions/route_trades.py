@@ -0,0 +1,225 @@
+import math
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from utils import Item, Merchandise
+
+# Goods on board as a sorted tuple of (k, w), as in bitmask_dp: once bought
+# only the type and weight of a good matter
+Cargo = Tuple[Tuple[int, float], ...]
+# Trade plan of a route: (goods kept, goods bought) at every stop but the last
+Plan = List[Tuple[Cargo, Cargo]]
+# Back-pointer of a cargo state: (previous back-pointer, kept, bought)
+Back = Optional[Tuple['Back', Cargo, Cargo]]
+
+
+class TradePlan(NamedTuple):
+    capital: float     # final capital with the best trades over the route
+    plan: Plan
+
+
+class RouteTrades:
+    """
+    Best trades over a fixed route, exactly.
+
+    A DP along the route keeps the best capital for every cargo on board
+    when leaving each stop, and prunes with the prices of the stops still
+    ahead (future[k], the best price of good k after the current stop):
+      - a good is bought only if future[k] beats its price;
+      - a good is always sold where it fetches at least future[k], since
+        keeping it can't earn more and takes room;
+      - a cargo state is dropped if another one holds a part of its goods
+        and has more money than the rest of them can ever fetch.
+    Routes start and end in Amsterdam; time limits are the caller's job.
+    """
+
+    def __init__(self, c_max: float, k_0: float, k_min: float,
+                 items_by_port: List[List[Item]]):
+        self.c_max = c_max
+        self.k_0 = k_0
+        self.k_min = k_min
+        self.items_by_port = items_by_port
+        self.m = max((len(items) for items in items_by_port), default=0)
+
+    def value(self, route: List[int]) -> float:
+        """Best final capital of route, -inf if K_min can't be paid on the way."""
+        best = self.best(route)
+        return best.capital if best is not None else -math.inf
+
+    def best(self, route: List[int]) -> Optional[TradePlan]:
+        """Best final capital of route and the trades that reach it."""
+        items_by_port, c_max, k_min = self.items_by_port, self.c_max, self.k_min
+        futures = self._futures(route)
+        layer: Dict[Cargo, Tuple[float, Back]] = {(): (self.k_0, None)}
+
+        for idx, port in enumerate(route[:-1]):
+            items_at_port = items_by_port[port]
+            future = futures[idx]
+            candidates = [
+                k for k, item in enumerate(items_at_port)
+                if future[k] > item.buy_price
+            ]
+
+            next_layer: Dict[Cargo, Tuple[float, Back]] = {}
+            for cargo, (capital, back) in layer.items():
+                # Goods that are better sold here than anywhere ahead
+                forced, optional, must_keep = 0.0, [], ()
+                for k, w in cargo:
+                    price = -math.inf
+                    if k < len(items_at_port):
+                        price = items_at_port[k].sell_price
+                    if price == -math.inf:
+                        must_keep += ((k, w),)
+                    elif price >= future[k]:
+                        forced += price
+                    else:
+                        optional.append((k, w, price))
+
+                for kept, after_sale in _sell(optional, capital + forced, 0, must_keep):
+                    if after_sale < k_min:
+                        continue
+                    used = sum(w for _, w in kept)
+                    for bought, after_purchase in _buy(
+                        items_at_port, candidates, 0, (), c_max - used,
+                        after_sale, k_min
+                    ):
+                        new_cargo = tuple(sorted(kept + bought))
+                        departure = after_purchase - k_min
+                        if departure > next_layer.get(new_cargo, (-math.inf,))[0]:
+                            next_layer[new_cargo] = (departure, (back, kept, bought))
+
+            if not next_layer:
+                return None
+            layer = _undominated(next_layer, future)
+
+        # Everything left on board is sold in Amsterdam
+        amsterdam = items_by_port[route[-1]]
+        best, best_back = -math.inf, None
+        for cargo, (capital, back) in layer.items():
+            final = capital + sum(amsterdam[k].sell_price for k, _ in cargo)
+            if final > best:
+                best, best_back = final, back
+        if best == -math.inf:
+            return None
+
+        plan: Plan = []
+        while best_back is not None:
+            best_back, kept, bought = best_back
+            plan.append((kept, bought))
+        plan.reverse()
+        return TradePlan(best, plan)
+
+    def merchandise(
+        self, route: List[int], plan: Plan, ports: Optional[List[int]] = None
+    ) -> Tuple[List[List[Merchandise]], List[List[Merchandise]]]:
+        """
+        Goods sold and bought at every stop of route following plan, for
+        solution.build_solution. ports maps the ports of route to those of the
+        original instance when the kernel works on a reduced one.
+        """
+        items_by_port = self.items_by_port
+        sold, bought = [], []
+        on_board: List[Merchandise] = []
+        for port, (kept, bought_here) in zip(route, plan):
+            # Goods with the same (k, w) are interchangeable
+            remaining = list(kept)
+            sold_here = []
+            for m in on_board:
+                if (m.k, m.w) in remaining:
+                    remaining.remove((m.k, m.w))
+                else:
+                    sold_here.append(m)
+            goods = [
+                Merchandise(
+                    port if ports is None else ports[port], k, w,
+                    items_by_port[port][k].buy_price
+                )
+                for k, w in bought_here
+            ]
+            on_board = [m for m in on_board if m not in sold_here] + goods
+            sold.append(sold_here)
+            bought.append(goods)
+
+        sold.append([])
+        bought.append([])
+        return sold, bought
+
+    def _futures(self, route: List[int]) -> List[List[float]]:
+        # futures[idx][k]: best sell price of good k at the stops after idx
+        items_by_port, m = self.items_by_port, self.m
+        future = [-math.inf] * m
+        futures = [future] * len(route)
+        for idx in range(len(route) - 2, -1, -1):
+            items_ahead = items_by_port[route[idx + 1]]
+            future = [
+                max(price, items_ahead[k].sell_price) if k < len(items_ahead) else price
+                for k, price in enumerate(future)
+            ]
+            futures[idx] = future
+        return futures
+
+
+def _sell(
+    optional: List[Tuple[int, float, float]], capital: float, i: int,
+    kept: Cargo
+) -> Iterator[Tuple[Cargo, float]]:
+    # Every subset of the optional goods kept on board, with the capital after
+    # selling the rest
+    if i == len(optional):
+        yield kept, capital
+        return
+
+    k, w, price = optional[i]
+    yield from _sell(optional, capital, i + 1, kept + ((k, w),))
+    yield from _sell(optional, capital + price, i + 1, kept)
+
+def _buy(
+    items_at_port: List[Item], candidates: List[int], i: int, bought: Cargo,
+    capacity: float, capital: float, k_min: float
+) -> Iterator[Tuple[Cargo, float]]:
+    # Every affordable subset of the candidates that fits in the hold
+    if i == len(candidates):
+        yield bought, capital
+        return
+
+    yield from _buy(
+        items_at_port, candidates, i + 1, bought, capacity, capital, k_min
+    )
+
+    k = candidates[i]
+    item = items_at_port[k]
+    if capacity - item.w >= 0 and capital - item.buy_price >= k_min:
+        yield from _buy(
+            items_at_port, candidates, i + 1, bought + ((k, item.w),),
+            capacity - item.w, capital - item.buy_price, k_min
+        )
+
+def _undominated(
+    layer: Dict[Cargo, Tuple[float, Back]], future: List[float]
+) -> Dict[Cargo, Tuple[float, Back]]:
+    # A state with a part of the goods of another one and at least what the
+    # rest of them can fetch ahead in cash does everything the other can.
+    # Dominance is transitive, so every state is only compared with the
+    # states of the layer whose cargo is a part of its own
+    if len(layer) == 1:
+        return layer
+
+    result = {}
+    for cargo, entry in layer.items():
+        capital = entry[0]
+        if not any(
+            part in layer and layer[part][0] >= capital + worth
+            for part, worth in _parts(cargo, future)
+        ):
+            result[cargo] = entry
+
+    return result
+
+def _parts(cargo: Cargo, future: List[float]) -> List[Tuple[Cargo, float]]:
+    # Every proper part of cargo, still sorted, with what the goods left out
+    # fetch at best
+    parts: List[Tuple[Cargo, float]] = [((), 0.0)]
+    for good in cargo:
+        price = future[good[0]]
+        parts = [(part + (good,), worth) for part, worth in parts] + [
+            (part, worth + price) for part, worth in parts
+        ]
+    return parts[1:]
@@ -0,0 +1,57 @@
+from typing import Dict, List, NamedTuple
+from utils import Item, Merchandise
+
+
+class Stop(NamedTuple):
+    port: int
+    arrival: float                # time at which the ship gets to the port
+    sold: List[Merchandise]       # goods sold at this stop
+    bought: List[Merchandise]     # goods bought at this stop
+    capital: float                # after trading, before paying K_min to leave
+    cargo: List[Merchandise]      # on board when leaving the port
+
+
+class Solution(NamedTuple):
+    capital: float                # final capital back in Amsterdam
+    stops: List[Stop]             # from Amsterdam back to Amsterdam
+    stats: Dict[str, float]       # search statistics (nodes, elapsed, ...)
+
+    @property
+    def route(self) -> List[int]:
+        return [stop.port for stop in self.stops]
+
+
+def build_solution(
+    d: List[List[float]], k_0: float, k_min: float,
+    items_by_port: List[List[Item]], route: List[int],
+    sold: List[List[Merchandise]], bought: List[List[Merchandise]],
+    stats: Dict[str, float]
+) -> Solution:
+    """
+    Timeline of a route from the goods sold and bought at each stop, with
+    sold[i] and bought[i] for route[i]. Whatever is still on board at the
+    last stop of a route that leaves Amsterdam is sold there.
+    """
+    stops: List[Stop] = []
+    cargo: List[Merchandise] = []
+    time, capital = 0.0, k_0
+
+    for idx, port in enumerate(route):
+        if idx > 0:
+            time += d[route[idx - 1]][port]
+            capital -= k_min
+
+        sold_here = list(sold[idx])
+        if idx == len(route) - 1 and idx > 0:
+            sold_here += [m for m in cargo if m not in sold_here]
+        for m in sold_here:
+            capital += items_by_port[port][m.k].sell_price
+        cargo = [m for m in cargo if m not in sold_here]
+
+        for m in bought[idx]:
+            capital -= m.buy_price
+        cargo += bought[idx]
+
+        stops.append(Stop(port, time, sold_here, list(bought[idx]), capital, cargo))
+
+    return Solution(capital, stops, stats)
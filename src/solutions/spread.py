@@ -0,0 +1,70 @@
+from typing import List
+import numpy as np
+from instance import Instance
+from utils import Item
+
+
+class SpreadIndex:
+    """
+    Precomputed arbitrage table of an instance.
+
+    spread[i, j, k] = sell[j, k] - buy[i, k] for goods bought at i and sold at j,
+    -inf when the good is unavailable at either port or j can't follow i in a
+    route (a port is visited once, except Amsterdam that is also the last one).
+    """
+
+    def __init__(self, instance: Instance):
+        n = instance.n
+        buy, sell, weight = instance.buy, instance.sell, instance.weight
+
+        valid = instance.available[:, None, :] & instance.available[None, :, :]
+        valid &= ~np.eye(n, dtype=bool)[:, :, None]
+        valid[0, 0, :] = instance.available[0]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.spread = np.where(
+                valid, sell[None, :, :] - buy[:, None, :], -np.inf
+            )
+            # Goods without weight: +inf per unit of weight if they earn
+            # anything, -inf (not nan) if they don't
+            ratio = self.spread / np.maximum(weight, 0.0)[:, None, :]
+            self.ratio = np.where(valid & ~np.isnan(ratio), ratio, -np.inf)
+
+        # best_spread[i, k]: best resale margin of good k bought at port i
+        self.best_spread = self.spread.max(axis=1)
+        self.profitable = self.best_spread > 0
+
+        # Python lists for O(1) lookups inside the searches
+        self.profitable_items: List[List[bool]] = self.profitable.tolist()
+        self.best_spread_items: List[List[float]] = self.best_spread.tolist()
+        # destinations[i][k]: ports where k bought at i sells at a profit, best first
+        self.destinations: List[List[List[int]]] = [
+            [
+                [int(j) for j in np.argsort(-self.spread[i, :, k], kind='stable')
+                 if self.spread[i, j, k] > 0]
+                for k in range(instance.m)
+            ]
+            for i in range(n)
+        ]
+        # buy_order[i]: profitable goods of port i, best margin per weight first
+        best_ratio = self.ratio.max(axis=1)
+        self.buy_order: List[List[int]] = [
+            [int(k) for k in np.argsort(-best_ratio[i], kind='stable')
+             if self.profitable[i, k]]
+            for i in range(n)
+        ]
+
+    @classmethod
+    def from_solve_args(
+        cls,
+        n: int,
+        d: List[List[float]],             # d[i][j] = d_{ij}
+        t_max: float,                     # T_max
+        c_max: float,                     # C_max
+        k_0: float,                       # K_0
+        k_min: float,                     # K_min
+        items_by_port: List[List[Item]]   # M_i for each port i
+    ) -> 'SpreadIndex':
+        return cls(Instance.from_solve_args(
+            n, d, t_max, c_max, k_0, k_min, items_by_port
+        ))
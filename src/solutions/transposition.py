@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+from utils import Merchandise
+
+# Floats in keys are rounded so that states reached through different
+# sell/buy orderings (a + b vs b + a) land on the same entry
+DIGITS = 9
+
+
+class TranspositionTable:
+    """LRU cache of subproblem results with an optional size cap."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[float]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: float) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+def state_key(
+    port: int, t_max: float, visited: int, c_max: float,
+    k_0: float, items_on_board: List[Merchandise]
+) -> Tuple:
+    # Only the type and weight of a good matter once it is on board
+    cargo = tuple(sorted((m.k, m.w) for m in items_on_board))
+    return (
+        port, round(t_max, DIGITS), visited,
+        round(c_max, DIGITS), round(k_0, DIGITS), cargo
+    )
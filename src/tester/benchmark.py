@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los algoritmos sobre barridos de parámetros del generador.
+
+Para cada combinación de puertos (n), tipos de mercancías (m) y holgura del
+tiempo máximo (t_max multiplicado por `tightness`) se generan instancias con
+semillas fijas y se mide, por algoritmo, el tiempo de pared, el pico de
+memoria (tracemalloc), los nodos expandidos (si el algoritmo los informa) y
+la calidad de la solución respecto a la mejor encontrada. Los resultados se
+guardan en JSON y se pueden comparar con una línea base para detectar
+regresiones.
+
+Uso (desde src/):
+    python -m tester.benchmark ports=3,4,5,6 items=2,4 tightness=1,1.5 seeds=3
+    python -m tester.benchmark solvers=brute_force_JAT,efficient ports=3,4,5
+    python -m tester.benchmark baseline=tester/results/benchmark_baseline.json
+"""
+
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tester.generator import generate_random_instance, parse_arguments
+from solutions import brute_force_CHP, brute_force_JAT, efficient
+
+# Algoritmo -> función que recibe la instancia y retorna (capital, nodos);
+# nodos es None si el algoritmo no los cuenta
+SOLVERS: Dict[str, Callable[..., Tuple[float, Optional[int]]]] = {
+    'brute_force_JAT': lambda *instance: (brute_force_JAT.solve(*instance), None),
+    'branch_and_bound': brute_force_JAT.solve_branch_and_bound,
+    'brute_force_CHP': lambda *instance: (brute_force_CHP.solve(*instance), None),
+    'efficient': lambda *instance: (efficient.solve(*instance), None),
+}
+# La fuerza bruta sin podas puede tardar minutos en una sola instancia con
+# n=6, y una ejecución en curso no se puede cortar: se mide sólo si se pide
+DEFAULT_SOLVERS = ['branch_and_bound', 'brute_force_CHP', 'efficient']
+
+# Tolerancias para considerar una regresión frente a la línea base
+TIME_TOLERANCE = 0.25         # 25% más lento
+MEMORY_TOLERANCE = 0.25       # 25% más memoria
+TIME_FLOOR = 0.005            # diferencias menores (segundos) son ruido
+QUALITY_TOLERANCE = 1e-6      # puntos porcentuales de calidad
+
+
+def make_instance(ports: int, items: int, tightness: float, seed: int) -> Tuple:
+    """Instancia del generador con t_max escalado por tightness."""
+    n, d, t_max, c_max, k_0, k_min, items_by_port = generate_random_instance(
+        min_ports=ports, max_ports=ports,
+        min_items=items, max_items=items,
+        seed=seed
+    )
+    return n, d, round(t_max * tightness, 1), c_max, k_0, k_min, items_by_port
+
+def measure(solver: str, instance: Tuple, seed: int, repeat: int = 1,
+            memory: bool = True) -> Dict:
+    """
+    Ejecuta un algoritmo sobre una instancia. El tiempo es el mínimo de
+    `repeat` ejecuciones; la memoria se mide en una ejecución aparte, porque
+    tracemalloc hace más lento el código.
+    """
+    run = SOLVERS[solver]
+    elapsed = float('inf')
+    for _ in range(repeat):
+        # El recocido usa el generador global: misma semilla, mismo resultado
+        random.seed(seed)
+        start = time.perf_counter()
+        capital, nodes = run(*instance)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        random.seed(seed)
+        tracemalloc.start()
+        try:
+            run(*instance)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {'time': elapsed, 'peak_memory': peak, 'nodes': nodes,
+            'capital': capital}
+
+def run_benchmark(
+    solvers: List[str], ports: List[int], items: List[int],
+    tightness: List[float], seeds: int, repeat: int = 1,
+    memory: bool = True, limit: float = 10.0
+) -> List[Dict]:
+    """
+    Recorre el barrido y retorna un registro por (algoritmo, instancia).
+    Cuando una ejecución de un algoritmo supera `limit` segundos, sus
+    ejecuciones restantes con los mismos m y holgura se omiten (status
+    'skipped'): las curvas de los algoritmos exponenciales se cortan en lugar
+    de bloquear el benchmark.
+    """
+    records = []
+    for m in items:
+        for factor in tightness:
+            too_slow = set()
+            for n in sorted(ports):
+                cases = [make_instance(n, m, factor, seed) for seed in range(seeds)]
+                config_records = []
+                for solver in solvers:
+                    for seed, instance in enumerate(cases):
+                        record = {
+                            'solver': solver, 'ports': n, 'items': m,
+                            'tightness': factor, 'seed': seed,
+                        }
+                        if solver in too_slow:
+                            record['status'] = 'skipped'
+                        else:
+                            record.update(measure(solver, instance, seed, repeat, memory))
+                            record['status'] = 'ok'
+                            # Una sola ejecución por encima del límite ya
+                            # corta la curva, sin esperar a las demás semillas
+                            if record['time'] > limit:
+                                too_slow.add(solver)
+                        config_records.append(record)
+
+                _add_quality(config_records)
+                records.extend(config_records)
+                print(f"  n={n:3d} m={m:2d} tightness={factor:<4} " + "  ".join(
+                    f"{solver}={_format_time(config_records, solver)}"
+                    for solver in solvers
+                ), flush=True)
+    return records
+
+def _add_quality(records: List[Dict]) -> None:
+    # Calidad: % del mejor capital encontrado por cualquier algoritmo en la
+    # misma instancia (el óptimo si corrió uno exacto)
+    best: Dict[int, float] = {}
+    for r in records:
+        if r['status'] == 'ok':
+            best[r['seed']] = max(best.get(r['seed'], -float('inf')), r['capital'])
+    for r in records:
+        if r['status'] == 'ok':
+            reference = best[r['seed']]
+            r['quality'] = 100.0 * r['capital'] / reference if reference > 0 else 100.0
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    """Una fila por (algoritmo, n, m, holgura) con medianas y medias."""
+    groups: Dict[Tuple, List[Dict]] = {}
+    for r in records:
+        key = (r['solver'], r['ports'], r['items'], r['tightness'])
+        groups.setdefault(key, []).append(r)
+
+    summary = []
+    for (solver, n, m, factor), group in groups.items():
+        done = [r for r in group if r['status'] == 'ok']
+        row = {
+            'solver': solver, 'ports': n, 'items': m, 'tightness': factor,
+            'runs': len(done), 'skipped': len(group) - len(done),
+        }
+        if done:
+            nodes = [r['nodes'] for r in done if r['nodes'] is not None]
+            memory = [r['peak_memory'] for r in done if r['peak_memory'] is not None]
+            row.update({
+                'median_time': statistics.median(r['time'] for r in done),
+                'max_time': max(r['time'] for r in done),
+                'peak_memory': max(memory) if memory else None,
+                'mean_nodes': statistics.mean(nodes) if nodes else None,
+                'mean_quality': statistics.mean(r['quality'] for r in done),
+                'min_quality': min(r['quality'] for r in done),
+            })
+        summary.append(row)
+    return summary
+
+def compare(summary: List[Dict], baseline: List[Dict]) -> List[str]:
+    """Regresiones de tiempo, memoria o calidad respecto a la línea base."""
+    reference = {
+        (row['solver'], row['ports'], row['items'], row['tightness']): row
+        for row in baseline
+    }
+    regressions = []
+    for row in summary:
+        key = (row['solver'], row['ports'], row['items'], row['tightness'])
+        old = reference.get(key)
+        if old is None or not row['runs'] or not old.get('runs'):
+            continue
+        name = f"{row['solver']} n={row['ports']} m={row['items']} tightness={row['tightness']}"
+
+        if (row['median_time'] > old['median_time'] * (1 + TIME_TOLERANCE)
+                and row['median_time'] - old['median_time'] > TIME_FLOOR):
+            regressions.append(
+                f"{name}: tiempo {old['median_time']:.4f}s -> {row['median_time']:.4f}s"
+            )
+        if (row['peak_memory'] is not None and old.get('peak_memory')
+                and row['peak_memory'] > old['peak_memory'] * (1 + MEMORY_TOLERANCE)):
+            regressions.append(
+                f"{name}: memoria {old['peak_memory']} B -> {row['peak_memory']} B"
+            )
+        if row['mean_quality'] < old['mean_quality'] - QUALITY_TOLERANCE:
+            regressions.append(
+                f"{name}: calidad {old['mean_quality']:.2f}% -> {row['mean_quality']:.2f}%"
+            )
+    return regressions
+
+def print_summary(summary: List[Dict]) -> None:
+    print(f"\n{'algoritmo':18s} {'n':>3s} {'m':>3s} {'holgura':>7s} {'runs':>4s} "
+          f"{'t mediano':>10s} {'memoria':>10s} {'nodos':>10s} {'calidad':>8s}")
+    for row in summary:
+        if not row['runs']:
+            print(f"{row['solver']:18s} {row['ports']:3d} {row['items']:3d} "
+                  f"{row['tightness']:7} {0:4d} {'omitido':>10s}")
+            continue
+        memory = f"{row['peak_memory'] / 1024:.0f} KiB" if row['peak_memory'] is not None else 'N/A'
+        nodes = f"{row['mean_nodes']:.0f}" if row['mean_nodes'] is not None else 'N/A'
+        print(f"{row['solver']:18s} {row['ports']:3d} {row['items']:3d} "
+              f"{row['tightness']:7} {row['runs']:4d} {row['median_time']:9.4f}s "
+              f"{memory:>10s} {nodes:>10s} {row['mean_quality']:7.2f}%")
+
+def _format_time(records: List[Dict], solver: str) -> str:
+    times = [r['time'] for r in records if r['solver'] == solver and r['status'] == 'ok']
+    return f"{statistics.median(times):.4f}s" if times else 'omitido'
+
+def _list(value: str, kind: type) -> List:
+    return [kind(v) for v in value.split(',') if v]
+
+def main() -> int:
+    params = parse_arguments(sys.argv[1:])
+    solvers = _list(params.get('solvers', ','.join(DEFAULT_SOLVERS)), str)
+    unknown = [s for s in solvers if s not in SOLVERS]
+    if unknown:
+        print(f"Algoritmos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SOLVERS)})")
+        return 2
+
+    config = {
+        'solvers': solvers,
+        'ports': _list(params.get('ports', '3,4,5,6,7'), int),
+        'items': _list(params.get('items', '2,4'), int),
+        'tightness': _list(params.get('tightness', '1.0'), float),
+        'seeds': int(params.get('seeds', 3)),
+        'repeat': int(params.get('repeat', 3)),
+        'memory': params.get('memory', '1') != '0',
+        'limit': float(params.get('limit', 10.0)),
+    }
+    output = Path(params.get(
+        'output', Path(__file__).parent / "results" / "benchmark.json"
+    ))
+
+    print("=" * 70)
+    print("BENCHMARK - COMPAÑÍA HOLANDESA")
+    print("=" * 70)
+    records = run_benchmark(**config)
+    summary = summarize(records)
+    print_summary(summary)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'config': config,
+            },
+            'summary': summary,
+            'records': records,
+        }, f, indent=2)
+    print(f"\nResultados guardados en: {output}")
+
+    if 'baseline' not in params:
+        return 0
+    with open(params['baseline'], encoding='utf-8') as f:
+        baseline = json.load(f)['summary']
+    regressions = compare(summary, baseline)
+    if regressions:
+        print(f"\n{len(regressions)} regresiones respecto a {params['baseline']}:")
+        for line in regressions:
+            print(f"  • {line}")
+        return 1
+    print(f"\nSin regresiones respecto a {params['baseline']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Formato compacto de instancias: un corpus JSON Lines con un registro por
+instancia, en lugar de un archivo Python ejecutable por caso.
+
+Cada línea guarda n, t_max, c_max, k_0, k_min, la matriz d y los ítems por
+puerto como [w, compra, venta] (null si el ítem no está disponible, ya que
+JSON no tiene infinitos), más metadatos opcionales como el número de caso y
+la semilla. Las matrices de distancias de instancias grandes (n mayor o igual
+que `npy_threshold`) se guardan aparte, en un .npy por instancia dentro de
+la carpeta <corpus>_d/, y se pueden cargar con memory-mapping.
+
+La lectura y la escritura son en streaming: nunca se tiene en memoria más de
+una instancia a la vez.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from solutions.utils import Item
+
+# Desde este número de puertos la matriz d va a un .npy aparte
+NPY_THRESHOLD = 64
+
+INF_ITEM = Item(float('inf'), float('inf'), float('-inf'))
+
+Instance = Tuple[int, List[List[float]], float, float, float, float, List[List[Item]]]
+
+
+class CorpusWriter:
+    """
+    Escribe instancias una a una en un corpus JSON Lines.
+
+        with CorpusWriter("tester/test_cases/corpus.jsonl") as writer:
+            writer.write(instance, case=1, seed=0)
+    """
+
+    def __init__(self, path, npy_threshold: int = NPY_THRESHOLD, append: bool = False):
+        self.path = Path(path)
+        self.npy_threshold = npy_threshold
+        self.matrices = self.path.parent / f"{self.path.stem}_d"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Registros en el archivo, también los que ya tenía al agregar: los
+        # .npy se nombran por posición y no pisan los de registros anteriores
+        self.count = 0
+        if append and self.path.exists():
+            self.count = sum(1 for _ in read_records(self.path))
+        self.file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, instance: Instance, **meta) -> None:
+        n, d, t_max, c_max, k_0, k_min, items_by_port = instance
+        record = dict(meta)
+        record.update({'n': n, 't_max': t_max, 'c_max': c_max,
+                       'k_0': k_0, 'k_min': k_min})
+
+        if n >= self.npy_threshold:
+            self.matrices.mkdir(exist_ok=True)
+            name = f"{self.count + 1:06d}.npy"
+            np.save(self.matrices / name, np.asarray(d, dtype=float))
+            record['d_file'] = f"{self.matrices.name}/{name}"
+        else:
+            record['d'] = [list(map(float, row)) for row in d]
+
+        record['items'] = [
+            [None if item.w == float('inf') else list(item) for item in items]
+            for items in items_by_port
+        ]
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'CorpusWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def write_corpus(path, instances: Iterable[Instance],
+                 npy_threshold: int = NPY_THRESHOLD) -> int:
+    """Escribe las instancias numeradas desde 1 y retorna cuántas escribió."""
+    with CorpusWriter(path, npy_threshold) as writer:
+        for case, instance in enumerate(instances, 1):
+            writer.write(instance, case=case)
+        return writer.count
+
+def read_records(path) -> Iterator[Dict]:
+    """Registros crudos del corpus, uno por línea."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def record_to_instance(record: Dict, base: Optional[Path] = None,
+                       mmap: bool = False) -> Instance:
+    """
+    Convierte un registro en los argumentos de solve. Con mmap=True una
+    matriz guardada en .npy se retorna como np.memmap de sólo lectura (útil
+    con instance.Instance); si no, se carga como lista de listas, igual que
+    las matrices guardadas en línea.
+    """
+    if 'd_file' in record:
+        matrix = np.load(Path(base or '.') / record['d_file'],
+                         mmap_mode='r' if mmap else None)
+        d = matrix if mmap else matrix.tolist()
+    else:
+        d = record['d']
+
+    items_by_port = [
+        [INF_ITEM if item is None else Item(*item) for item in items]
+        for items in record['items']
+    ]
+    return (record['n'], d, record['t_max'], record['c_max'],
+            record['k_0'], record['k_min'], items_by_port)
+
+def read_corpus(path, mmap: bool = False) -> Iterator[Tuple[Dict, Instance]]:
+    """Recorre el corpus en streaming: (metadatos, instancia) por registro."""
+    base = Path(path).parent
+    for record in read_records(path):
+        meta = {key: value for key, value in record.items()
+                if key not in ('n', 'd', 'd_file', 't_max', 'c_max',
+                               'k_0', 'k_min', 'items')}
+        yield meta, record_to_instance(record, base, mmap)
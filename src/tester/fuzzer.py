@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Fuzzing diferencial de los algoritmos.
+
+Genera instancias aleatorias con generate_random_instance (semillas start,
+start + 1, ...), ejecuta los algoritmos (los del benchmark y los demás
+motores de solutions/, el MILP sólo si hay un backend instalado) con un
+tiempo límite por algoritmo y busca discrepancias:
+  - dos algoritmos exactos con capitales distintos;
+  - una heurística que supera el óptimo de los exactos;
+  - un algoritmo que lanza una excepción.
+Un algoritmo que no termina a tiempo no cuenta en esa instancia.
+
+Cada discrepancia se reduce a un contraejemplo mínimo (quitando puertos,
+tipos de mercancías e ítems y redondeando números mientras la discrepancia
+se mantenga) que se agrega al corpus tester/fuzz_cases/corpus.jsonl, listo
+para repetir con:
+    python -m tester.validator dir=fuzz_cases
+
+Uso (desde src/):
+    python -m tester.fuzzer cases=500 workers=4 timeout=2
+    python -m tester.fuzzer duration=600 min_ports=3 max_ports=8
+"""
+
+import importlib.util
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tester.generator import (
+    CORPUS_FILE, enforce_triangle_inequality, generate_random_instance,
+    parse_arguments
+)
+from tester.benchmark import SOLVERS
+from tester.corpus import INF_ITEM, CorpusWriter
+from tester.validator import MATCH_TOLERANCE, install_timeout, run_solver
+from solutions import (
+    anytime, bitmask_dp, brute_force_JAT, iterative_search, lns, milp
+)
+from solutions.reachability import select_ports
+from solutions.route_trades import RouteTrades
+
+def _route_trades(n, d, t_max, c_max, k_0, k_min, items_by_port):
+    # La ruta óptima del branch and bound, con sus compras y ventas
+    # recalculadas por RouteTrades
+    route = brute_force_JAT.solve_detailed(
+        n, d, t_max, c_max, k_0, k_min, items_by_port
+    ).route
+    value = RouteTrades(c_max, k_0, k_min, items_by_port).value(route)
+    return max(k_0, value), None
+
+# Los algoritmos del benchmark más los demás motores de solutions/, con la
+# misma firma: instancia -> (capital, nodos)
+FUZZ_SOLVERS = dict(SOLVERS, **{
+    'bitmask_dp': lambda *instance: (bitmask_dp.solve(*instance), None),
+    'iterative_search': lambda *instance: (iterative_search.solve(*instance), None),
+    'memoized': lambda *instance: (brute_force_JAT.solve_memoized(*instance)[0], None),
+    'route_trades': _route_trades,
+    'lns': lambda *instance: (lns.solve(*instance), None),
+    'anytime': lambda *instance: (anytime.solve(*instance), None),
+})
+
+# Algoritmos que retornan el óptimo; el resto sólo no debe superarlo
+EXACT = ('brute_force_JAT', 'branch_and_bound', 'brute_force_CHP', 'bitmask_dp',
+         'iterative_search', 'memoized', 'route_trades', 'anytime')
+
+# El MILP sólo se prueba si hay un backend instalado
+if any(importlib.util.find_spec(backend) for backend in milp.BACKENDS):
+    FUZZ_SOLVERS['milp'] = lambda *instance: (milp.solve(*instance), None)
+    EXACT += ('milp',)
+
+# Discrepancia: (tipo, algoritmos involucrados, descripción)
+Mismatch = Tuple[str, Tuple[str, ...], str]
+
+
+def find_mismatch(results: Dict[str, Dict]) -> Optional[Mismatch]:
+    """Primera discrepancia entre los resultados de run_solver, si hay."""
+    for solver, r in results.items():
+        if r['status'] == 'EXECUTION_ERROR':
+            return 'error', (solver,), f"{solver}: {r['error']}"
+
+    exact = {
+        solver: r['capital'] for solver, r in results.items()
+        if solver in EXACT and r['status'] == 'OK'
+    }
+    if not exact:
+        return None
+    low = min(exact, key=exact.get)
+    high = max(exact, key=exact.get)
+    if exact[high] - exact[low] >= MATCH_TOLERANCE:
+        return ('exact', (low, high),
+                f"{low}={exact[low]} difiere de {high}={exact[high]}")
+
+    for solver, r in results.items():
+        if (solver not in EXACT and r['status'] == 'OK'
+                and r['capital'] > exact[high] + MATCH_TOLERANCE):
+            return ('bound', (high, solver),
+                    f"{solver}={r['capital']} supera el óptimo {high}={exact[high]}")
+    return None
+
+def check(instance: Tuple, solvers: List[str], timeout: float,
+          seed: int) -> Tuple[Optional[Mismatch], Dict[str, Dict]]:
+    """Ejecuta los algoritmos sobre una instancia y busca discrepancias."""
+    results = {
+        solver: run_solver(solver, instance, timeout, seed, FUZZ_SOLVERS)
+        for solver in solvers
+    }
+    return find_mismatch(results), results
+
+def shrink(instance: Tuple, mismatch: Mismatch, timeout: float,
+           seed: int) -> Tuple[Tuple, int]:
+    """
+    Reduce la instancia mientras reproduzca la misma discrepancia (mismo tipo
+    y mismos algoritmos), volviendo a ejecutar sólo los algoritmos
+    involucrados. Retorna la instancia reducida y cuántas reducciones aplicó.
+    """
+    kind, solvers, _ = mismatch
+    steps = 0
+    progress = True
+    while progress:
+        progress = False
+        for candidate in _smaller(instance):
+            found, _ = check(candidate, list(solvers), timeout, seed)
+            if found is not None and found[:2] == (kind, solvers):
+                instance = candidate
+                steps += 1
+                progress = True
+                break
+    return instance, steps
+
+def _smaller(instance: Tuple) -> Iterator[Tuple]:
+    # Instancias un paso más simples, de la reducción más grande a la menor
+    n, d, t_max, c_max, k_0, k_min, items_by_port = instance
+    m = len(items_by_port[0]) if items_by_port else 0
+
+    # Sin un puerto (Amsterdam siempre queda)
+    for port in range(n - 1, 0, -1):
+        ports = [i for i in range(n) if i != port]
+        n_less, d_less, items_less = select_ports(ports, d, items_by_port)
+        yield n_less, d_less, t_max, c_max, k_0, k_min, items_less
+
+    # Sin un tipo de mercancía
+    if m > 1:
+        for k in range(m - 1, -1, -1):
+            items_less = [items[:k] + items[k + 1:] for items in items_by_port]
+            yield n, d, t_max, c_max, k_0, k_min, items_less
+
+    # Sin un ítem en un puerto
+    for port, items in enumerate(items_by_port):
+        for k, item in enumerate(items):
+            if item != INF_ITEM:
+                items_less = [row[:] for row in items_by_port]
+                items_less[port][k] = INF_ITEM
+                yield n, d, t_max, c_max, k_0, k_min, items_less
+
+    # Números redondeados a enteros: distancias (manteniendo la
+    # desigualdad triangular), cada parámetro y cada ítem (al menos 1, como
+    # en el generador)
+    rounded = enforce_triangle_inequality([[float(round(x)) for x in row] for row in d])
+    if rounded != d:
+        yield n, rounded, t_max, c_max, k_0, k_min, items_by_port
+    scalars = [t_max, c_max, k_0, k_min]
+    for idx, value in enumerate(scalars):
+        if value != round(value):
+            changed = scalars[:]
+            changed[idx] = float(round(value))
+            yield (n, d, *changed, items_by_port)
+    for port, items in enumerate(items_by_port):
+        for k, item in enumerate(items):
+            if item != INF_ITEM and any(x != max(1.0, round(x)) for x in item):
+                items_less = [row[:] for row in items_by_port]
+                items_less[port][k] = type(item)(*(max(1.0, float(round(x))) for x in item))
+                yield n, d, t_max, c_max, k_0, k_min, items_less
+
+def _check_seed(job: Tuple[int, dict, List[str], float]) -> Tuple:
+    seed, params, solvers, timeout = job
+    instance = generate_random_instance(seed=seed, **params)
+    mismatch, results = check(instance, solvers, timeout, seed)
+    return seed, instance, mismatch, results
+
+def save_reproducer(path: Path, instance: Tuple, seed: int, mismatch: Mismatch,
+                    results: Dict[str, Dict]) -> int:
+    """Agrega el contraejemplo al corpus y retorna su número de caso."""
+    with CorpusWriter(path, append=True) as writer:
+        case = writer.count + 1
+        writer.write(
+            instance, case=case, seed=seed, kind=mismatch[0],
+            solvers=list(mismatch[1]), details=mismatch[2],
+            capitals={s: r['capital'] for s, r in results.items()}
+        )
+    return case
+
+def fuzz(solvers: List[str], cases: Optional[int], duration: Optional[float],
+         start: int, workers: int, timeout: float, params: dict,
+         output: Path) -> List[Dict]:
+    """
+    Ejecuta el fuzzing hasta revisar `cases` instancias o agotar `duration`
+    segundos, y retorna las discrepancias encontradas ya reducidas.
+    """
+    install_timeout()
+    found = []
+    checked = 0
+    deadline = time.perf_counter() + duration if duration else None
+    batch = max(1, workers) * 4
+    seed = start
+
+    with Pool(workers, initializer=install_timeout) as pool:
+        while cases is None or checked < cases:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            size = batch if cases is None else min(batch, cases - checked)
+            jobs = [(s, params, solvers, timeout) for s in range(seed, seed + size)]
+            seed += size
+
+            for s, instance, mismatch, results in pool.map(_check_seed, jobs):
+                checked += 1
+                if mismatch is None:
+                    continue
+                print(f"✗ Semilla {s}: {mismatch[2]}")
+                small, steps = shrink(instance, mismatch, timeout, s)
+                small_mismatch, small_results = check(small, list(mismatch[1]), timeout, s)
+                if small_mismatch is None:
+                    # Discrepancia que depende del tiempo: se guarda sin reducir
+                    small, steps, small_mismatch, small_results = instance, 0, mismatch, results
+                case = save_reproducer(output, small, s, small_mismatch, small_results)
+                print(f"  reducido a n={small[0]}, m={len(small[6][0]) if small[6] else 0} "
+                      f"en {steps} pasos: {small_mismatch[2]} (caso {case})")
+                found.append({'seed': s, 'case': case, 'kind': mismatch[0],
+                              'solvers': list(mismatch[1]), 'details': small_mismatch[2]})
+
+            print(f"  {checked} instancias revisadas, {len(found)} discrepancias", flush=True)
+    return found
+
+def main() -> int:
+    params = parse_arguments(sys.argv[1:])
+    solvers = [s for s in params.get('solvers', ','.join(FUZZ_SOLVERS)).split(',') if s]
+    unknown = [s for s in solvers if s not in FUZZ_SOLVERS]
+    if unknown:
+        print(f"Algoritmos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(FUZZ_SOLVERS)})")
+        return 2
+
+    duration = float(params['duration']) if 'duration' in params else None
+    cases = int(params['cases']) if 'cases' in params else (None if duration else 200)
+    output = Path(__file__).parent / params.get('dir', 'fuzz_cases') / CORPUS_FILE
+    output.parent.mkdir(exist_ok=True)
+
+    print("=" * 70)
+    print("FUZZING DIFERENCIAL - COMPAÑÍA HOLANDESA")
+    print("=" * 70)
+    found = fuzz(
+        solvers=solvers,
+        cases=cases,
+        duration=duration,
+        start=int(params.get('start', 0)),
+        workers=int(params.get('workers', 1)),
+        timeout=float(params.get('timeout', 2)),
+        params={
+            'min_ports': int(params.get('min_ports', 3)),
+            'max_ports': int(params.get('max_ports', 6)),
+            'min_items': int(params.get('min_items', 2)),
+            'max_items': int(params.get('max_items', 4)),
+        },
+        output=output,
+    )
+
+    if found:
+        print(f"\n{len(found)} contraejemplos guardados en: {output}")
+        return 1
+    print("\nSin discrepancias")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
 import random
 import math
-from typing import List, Tuple
+from multiprocessing import Pool
+from typing import Iterator, List, Tuple
 from pathlib import Path
 
+import numpy as np
+
 # Añadir el directorio padre al path para importar utils
 import sys
 src_dir = Path(__file__).parent.parent
@@ -10,22 +13,23 @@ sys.path.insert(0, str(src_dir))
 sys.path.insert(0, str(src_dir / "solutions"))
 
 from solutions.utils import Item
+from solutions.reachability import floyd_warshall
+from tester.corpus import CorpusWriter
+
+# Un atajo por k sólo reemplaza una distancia si la mejora en más que esto
+TRIANGLE_TOLERANCE = 1e-9
+
+# Nombre del corpus dentro de la carpeta de casos de prueba
+CORPUS_FILE = "corpus.jsonl"
 
 def enforce_triangle_inequality(d: List[List[float]]) -> List[List[float]]:
-    """Aplica el algoritmo de Floyd-Warshall para asegurar la desigualdad triangular."""
-    n = len(d)
-    # Hacer una copia
-    dist = [row[:] for row in d]
-    
-    # Aplicar Floyd-Warshall para encontrar caminos más cortos
-    for k in range(n):
-        for i in range(n):
-            for j in range(n):
-                if dist[i][j] > dist[i][k] + dist[k][j] + 1e-9:
-                    dist[i][j] = dist[i][k] + dist[k][j]
-                    dist[j][i] = dist[i][j]
-    
-    return dist
+    """
+    Aplica el algoritmo de Floyd-Warshall para asegurar la desigualdad
+    triangular. Usa la versión vectorizada de solutions/reachability.py, que
+    relaja toda la matriz a la vez para cada k: con d simétrica el resultado
+    es el mismo que el del triple bucle con tolerancia 1e-9.
+    """
+    return floyd_warshall(d, TRIANGLE_TOLERANCE).tolist()
 
 def generate_random_instance(
     min_ports: int = 3,
@@ -37,18 +41,22 @@ def generate_random_instance(
     """
     Genera una instancia aleatoria del problema de la Compañía Holandesa.
     TODOS los puertos tienen exactamente m tipos de mercancías.
+
+    Con una semilla se usa un generador propio (random.Random(seed)), que
+    produce la misma instancia que antes sembrar el generador global, pero
+    sin tocarlo: las instancias se pueden generar en cualquier orden o en
+    paralelo. Sin semilla se usa el generador global.
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = random.Random(seed) if seed is not None else random
     
     # 1. Generar número de puertos
-    n = random.randint(min_ports, max_ports)
+    n = rng.randint(min_ports, max_ports)
     
     # 2. Generar número de tipos de mercancías (m) - IGUAL PARA TODOS LOS PUERTOS
-    m = random.randint(min_items, max_items)
+    m = rng.randint(min_items, max_items)
     
     # 3. Generar matriz de distancias (simétrica, con 0 en diagonal) y con desigualdad triangular
-    coordinates = [(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(n)]
+    coordinates = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(n)]
     
     d = [[0.0 for _ in range(n)] for _ in range(n)]
     for i in range(n):
@@ -66,7 +74,7 @@ def generate_random_instance(
         min_distance_to_other = min([d[0][i] for i in range(1, n)])
         second_min = sorted([d[0][i] for i in range(1, n)])[1] if n > 2 else min_distance_to_other
         
-        t_max = random.uniform(
+        t_max = rng.uniform(
             min_distance_to_other * 2 + 0.5,
             min_distance_to_other * 4 + second_min * 2
         )
@@ -75,15 +83,15 @@ def generate_random_instance(
         t_max = 10.0
     
     # 5. Generar capacidad máxima de carga
-    c_max = random.uniform(5, 20)
+    c_max = rng.uniform(5, 20)
     c_max = round(c_max, 1)
     
     # 6. Generar capital inicial
-    k_0 = random.uniform(10, 50)
+    k_0 = rng.uniform(10, 50)
     k_0 = round(k_0, 1)
     
     # 7. Generar capital mínimo
-    k_min_percent = random.uniform(0.1, 0.3)
+    k_min_percent = rng.uniform(0.1, 0.3)
     k_min = round(k_0 * k_min_percent, 1)
     
     # 8. Generar ítems por puerto - TODOS LOS PUERTOS TIENEN EXACTAMENTE m TIPOS
@@ -95,17 +103,17 @@ def generate_random_instance(
         
         for _ in range(m):  # Exactamente m tipos por puerto
             # Peso aleatorio (entre 1 y c_max/2 para que sea posible cargar varios)
-            w = random.uniform(1, c_max / 2)
+            w = rng.uniform(1, c_max / 2)
             w = round(w, 1)
             
             # Precio de compra (asegurar que k_0 puede comprar al menos un ítem)
             max_buy_price = k_0 * 1.5
-            buy_price = random.uniform(1, max_buy_price)
+            buy_price = rng.uniform(1, max_buy_price)
             buy_price = round(buy_price, 1)
             
             # Precio de venta
             # Algunos ítems pueden no ser rentables (venta < compra)
-            profit_margin = random.uniform(0.7, 1)  # 0.8 = pérdida, 1.5 = ganancia
+            profit_margin = rng.uniform(0.7, 1)  # 0.8 = pérdida, 1.5 = ganancia
             sell_price = round(buy_price * profit_margin, 1)
 
             item = Item(w=w, buy_price=buy_price, sell_price=sell_price)
@@ -115,7 +123,7 @@ def generate_random_instance(
                 sell_price=float('-inf')
             )
             
-            final_item = item if random.uniform(0, 1) < 0.7 else item_inf
+            final_item = item if rng.uniform(0, 1) < 0.7 else item_inf
 
             port_items.append(final_item)
         
@@ -131,11 +139,139 @@ def generate_random_instance(
         
         if not feasible:
             min_round_trip = min([d[0][i] * 2 for i in range(1, n)])
-            t_max = min_round_trip + random.uniform(0.5, 2.0)
+            t_max = min_round_trip + rng.uniform(0.5, 2.0)
             t_max = round(t_max, 1)
     
     return n, d, t_max, c_max, k_0, k_min, items_by_port
 
+def generate_large_instance(
+    min_ports: int = 3,
+    max_ports: int = 5,
+    min_items: int = 2,
+    max_items: int = 4,
+    seed: int = None
+) -> Tuple[int, List[List[float]], float, float, float, float, List[List[Item]]]:
+    """
+    Versión con NumPy de generate_random_instance para instancias grandes
+    (cientos o miles de puertos): mismas distribuciones, pero distancias e
+    ítems se generan como arreglos con np.random.default_rng(seed), sin
+    bucles de Python sobre los pares de puertos. No produce las mismas
+    instancias que generate_random_instance para una misma semilla.
+    """
+    rng = np.random.default_rng(seed)
+
+    n = int(rng.integers(min_ports, max_ports, endpoint=True))
+    m = int(rng.integers(min_items, max_items, endpoint=True))
+
+    # Distancias euclídeas redondeadas entre coordenadas en [0, 100)^2
+    x, y = rng.uniform(0, 100, size=(2, n))
+    d = np.round(np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :]), 1)
+    d = floyd_warshall(d, TRIANGLE_TOLERANCE)
+
+    from_home = np.sort(d[0, 1:])
+    if n > 1:
+        second_min = from_home[1] if n > 2 else from_home[0]
+        t_max = round(rng.uniform(from_home[0] * 2 + 0.5,
+                                  from_home[0] * 4 + second_min * 2), 1)
+    else:
+        t_max = 10.0
+
+    c_max = round(rng.uniform(5, 20), 1)
+    k_0 = round(rng.uniform(10, 50), 1)
+    k_min = round(k_0 * rng.uniform(0.1, 0.3), 1)
+
+    # Ítems (n, m): mismo reparto de pesos, precios y disponibilidad
+    w = np.round(rng.uniform(1, c_max / 2, size=(n, m)), 1)
+    buy = np.round(rng.uniform(1, k_0 * 1.5, size=(n, m)), 1)
+    sell = np.round(buy * rng.uniform(0.7, 1, size=(n, m)), 1)
+    available = rng.uniform(0, 1, size=(n, m)) < 0.7
+
+    item_inf = Item(w=float('inf'), buy_price=float('inf'), sell_price=float('-inf'))
+    items_by_port = [
+        [Item(*item) if ok else item_inf for *item, ok in zip(*row)]
+        for row in zip(w.tolist(), buy.tolist(), sell.tolist(), available.tolist())
+    ]
+
+    # Asegurar que haya al menos una solución factible
+    if n > 1 and not (from_home * 2 <= t_max).any():
+        t_max = round(from_home[0] * 2 + rng.uniform(0.5, 2.0), 1)
+
+    return n, d.tolist(), float(t_max), c_max, k_0, k_min, items_by_port
+
+# Motor -> función que genera una instancia a partir de una semilla
+GENERATORS = {
+    'python': generate_random_instance,
+    'numpy': generate_large_instance,
+}
+
+def iter_instances(
+    count: int,
+    start: int = 0,
+    shard: int = 0,
+    num_shards: int = 1,
+    engine: str = 'python',
+    **params
+) -> Iterator[Tuple[int, Tuple]]:
+    """
+    Genera en streaming (semilla, instancia) para las semillas
+    start..start+count-1. Cada instancia depende sólo de su semilla, así que
+    el trabajo se reparte en num_shards fragmentos disjuntos (el fragmento
+    `shard` toma una de cada num_shards semillas) que pueden generarse en
+    procesos o máquinas distintos.
+    """
+    generate = GENERATORS[engine]
+    for seed in range(start + shard, start + count, num_shards):
+        yield seed, generate(seed=seed, **params)
+
+def _generate_seed(job: Tuple[str, dict, int]) -> Tuple[int, Tuple]:
+    engine, params, seed = job
+    return seed, GENERATORS[engine](seed=seed, **params)
+
+def generate_corpus(
+    path,
+    count: int,
+    start: int = 0,
+    shard: int = 0,
+    num_shards: int = 1,
+    workers: int = 1,
+    engine: str = 'python',
+    **params
+) -> int:
+    """
+    Escribe en un corpus (tester/corpus.py) las instancias de iter_instances,
+    generándolas con `workers` procesos. El resultado no depende del número
+    de procesos; el caso de la semilla s es el s + 1. Retorna cuántas
+    instancias escribió.
+    """
+    seeds = range(start + shard, start + count, num_shards)
+    with CorpusWriter(path) as writer:
+        if workers > 1:
+            with Pool(workers) as pool:
+                jobs = ((engine, params, seed) for seed in seeds)
+                chunk = max(1, len(seeds) // (workers * 8))
+                for seed, instance in pool.imap(_generate_seed, jobs, chunk):
+                    writer.write(instance, case=seed + 1, seed=seed)
+        else:
+            for seed, instance in iter_instances(
+                count, start, shard, num_shards, engine, **params
+            ):
+                writer.write(instance, case=seed + 1, seed=seed)
+        return writer.count
+
+def corpus_name(shard: int = 0, num_shards: int = 1) -> str:
+    """
+    Nombre del corpus de un fragmento: cada fragmento escribe su propio
+    archivo, así varios pueden generarse a la vez en la misma carpeta.
+    """
+    if num_shards == 1:
+        return CORPUS_FILE
+    return f"corpus.shard{shard}of{num_shards}.jsonl"
+
+def corpus_files(directory: Path) -> List[Path]:
+    """El corpus de una carpeta y los de sus fragmentos, los que existan."""
+    files = [directory / CORPUS_FILE] + sorted(directory.glob("corpus.shard*of*.jsonl"))
+    return [file for file in files if file.exists()]
+
 def print_instance(
     n: int,
     d: List[List[float]],
@@ -340,28 +476,49 @@ def generate_test_cases(
     max_ports=5,
     min_items=2,
     max_items=4, 
+    fmt="jsonl",
+    start=0,
+    shard=0,
+    num_shards=1,
+    workers=1,
+    engine="python",
 ):
-    """Genera múltiples casos de prueba y los guarda en archivos."""
+    """
+    Genera múltiples casos de prueba y los guarda en archivos: con
+    fmt="jsonl" en un único corpus (tester/corpus.py), con fmt="py" como un
+    par de archivos Python ejecutables por caso. El caso i usa la semilla
+    i - 1.
+    """
     # Crear directorio si no existe
     output_path = Path(__file__).parent / output_dir
     output_path.mkdir(exist_ok=True)
     
-    # Crear archivo __init__.py en la carpeta test_cases
-    create_init_file(output_path)
+    params = dict(
+        min_ports=min_ports,
+        max_ports=max_ports,
+        min_items=min_items,  # Mínimo 2 tipos de mercancías
+        max_items=max_items,  # Máximo 4 tipos de mercancías
+    )
     
     print(f"\nGenerando {num_cases} casos de prueba...")
     
-    for i in range(num_cases):
-        print(f"  Caso {i+1}/{num_cases}...")
-        
-        # Generar instancia con m constante para todos los puertos
-        instance = generate_random_instance(
-            min_ports=min_ports,
-            max_ports=max_ports,
-            min_items=min_items,  # Mínimo 2 tipos de mercancías
-            max_items=max_items,  # Máximo 4 tipos de mercancías
-            seed=i
+    if fmt != "py":
+        name = corpus_name(shard, num_shards)
+        written = generate_corpus(
+            output_path / name, num_cases, start, shard, num_shards,
+            workers, engine, **params
         )
+        print(f"\n✓ Generados {written} casos de prueba en '{output_dir}/{name}'")
+        return
+    
+    # Crear archivo __init__.py en la carpeta test_cases
+    create_init_file(output_path)
+    
+    # i es la semilla del caso i + 1
+    for i, instance in iter_instances(
+        num_cases, start, shard, num_shards, engine, **params
+    ):
+        print(f"  Caso {i+1}/{start + num_cases}...")
         
         # Guardar instancia básica
         case_file = output_path / f"test_case_{i+1}.py"
@@ -397,6 +554,12 @@ def main():
     max_ports = int(params.get('max_ports', 5))
     min_items = int(params.get('min_items', 2))
     max_items = int(params.get('max_items', 4))
+    fmt = params.get('format', 'jsonl')
+    start = int(params.get('start', 0))
+    shard = int(params.get('shard', 0))
+    num_shards = int(params.get('num_shards', 1))
+    workers = int(params.get('workers', 1))
+    engine = params.get('engine', 'python')
         
     print("="*70)
     print("GENERADOR DE CASOS DE PRUEBA - COMPAÑÍA HOLANDESA")
@@ -410,7 +573,13 @@ def main():
         min_ports=min_ports,
         max_ports=max_ports,
         min_items=min_items,
-        max_items=max_items
+        max_items=max_items,
+        fmt=fmt,
+        start=start,
+        shard=shard,
+        num_shards=num_shards,
+        workers=workers,
+        engine=engine
     )
     
     print("\n" + "="*70)
@@ -0,0 +1,151 @@
+"""
+Casos pequeños y deterministas para los motores de solutions/.
+
+Uso:
+    python -m pytest -q src/tester
+"""
+
+import importlib.util
+import random
+import sys
+from functools import lru_cache
+from itertools import permutations
+from pathlib import Path
+
+import pytest
+
+# Añadir src/ y solutions/ al path, también si pytest corre desde la raíz
+src_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(src_dir))
+sys.path.insert(0, str(src_dir / "solutions"))
+
+from solutions import bitmask_dp, brute_force_JAT, iterative_search, lns, milp
+from solutions.route_trades import RouteTrades
+from solutions.utils import Item
+
+INF_ITEM = Item(float('inf'), float('inf'), float('-inf'))
+
+# Sin desigualdad triangular: d[0][1] + d[1][2] < d[0][2], así que
+# insertar el puerto 1 entre 0 y 2 acorta la ruta en una unidad
+SHORTCUT = (
+    3,
+    [[0.0, 2.0, 5.0],
+     [2.0, 0.0, 2.0],
+     [5.0, 2.0, 0.0]],
+    20.0, 5.0, 30.0, 1.0,
+    [[Item(1.0, 10.0, 10.0), Item(1.0, 10.0, 10.0)],
+     [Item(1.0, 1.0, 2.0), Item(1.0, 8.0, 30.0)],
+     [Item(1.0, 2.0, 20.0), INF_ITEM]],
+)
+SHORTCUT_OPTIMUM = 86.0
+
+# Con desigualdad triangular; la ruta óptima es 0 -> 1 -> 2 -> 3 -> 0
+FOUR = (
+    4,
+    [[0.0, 3.0, 4.0, 5.0],
+     [3.0, 0.0, 2.0, 4.0],
+     [4.0, 2.0, 0.0, 3.0],
+     [5.0, 4.0, 3.0, 0.0]],
+    14.0, 6.0, 20.0, 2.0,
+    [[Item(2.0, 5.0, 6.0), Item(3.0, 4.0, 5.0)],
+     [Item(2.0, 3.0, 9.0), Item(3.0, 10.0, 4.0)],
+     [Item(2.0, 8.0, 12.0), Item(3.0, 2.0, 11.0)],
+     [INF_ITEM, Item(3.0, 6.0, 15.0)]],
+)
+
+# Pesos y distancias no enteros; la ruta óptima es 0 -> 4 -> 3 -> 1 -> 2 -> 0
+FIVE = (
+    5,
+    [[0.0, 2.5, 4.0, 6.0, 3.5],
+     [2.5, 0.0, 2.0, 4.5, 5.0],
+     [4.0, 2.0, 0.0, 3.0, 4.0],
+     [6.0, 4.5, 3.0, 0.0, 2.5],
+     [3.5, 5.0, 4.0, 2.5, 0.0]],
+    16.5, 7.5, 15.0, 3.0,
+    [[Item(1.5, 6.0, 7.0), Item(4.0, 9.0, 10.0)],
+     [Item(1.5, 2.0, 8.5), Item(4.0, 7.0, 16.0)],
+     [Item(1.5, 5.0, 9.0), INF_ITEM],
+     [INF_ITEM, Item(4.0, 12.0, 21.0)],
+     [Item(1.5, 4.0, 11.0), Item(4.0, 5.0, 8.0)]],
+)
+
+# Ninguna mercancía se vende por más de lo que cuesta: quedarse en Amsterdam
+HOME = (
+    3,
+    [[0.0, 4.0, 5.0],
+     [4.0, 0.0, 3.0],
+     [5.0, 3.0, 0.0]],
+    12.0, 5.0, 10.0, 1.0,
+    [[Item(1.0, 5.0, 4.0), Item(2.0, 3.0, 2.0)],
+     [Item(1.0, 6.0, 5.0), Item(2.0, 4.0, 3.0)],
+     [Item(1.0, 7.0, 6.0), Item(2.0, 5.0, 4.0)]],
+)
+
+# (instancia, capital óptimo)
+CASES = {
+    'shortcut': (SHORTCUT, SHORTCUT_OPTIMUM),
+    'four': (FOUR, 49.0),
+    'five': (FIVE, 42.0),
+    'home': (HOME, 10.0),
+}
+
+
+@lru_cache(maxsize=None)
+def reference(name: str) -> float:
+    """Capital de brute_force_JAT.solve, la referencia de los demás motores."""
+    return brute_force_JAT.solve(*CASES[name][0])
+
+@pytest.mark.parametrize('name', CASES)
+def test_brute_force_jat_optimum(name):
+    assert reference(name) == pytest.approx(CASES[name][1])
+
+@pytest.mark.parametrize('name', CASES)
+def test_bitmask_dp(name):
+    assert bitmask_dp.solve(*CASES[name][0]) == pytest.approx(reference(name))
+
+@pytest.mark.parametrize('name', CASES)
+def test_iterative_search(name):
+    assert iterative_search.solve(*CASES[name][0]) == pytest.approx(reference(name))
+
+def feasible_routes(d, t_max):
+    # Rutas 0 -> ... -> 0 que dejan tiempo para volver directo desde cada puerto
+    for length in range(1, len(d)):
+        for ports in permutations(range(1, len(d)), length):
+            route, t_left = [0, *ports, 0], t_max
+            for a, b in zip(route, route[1:]):
+                if t_left < d[a][b] + d[b][0]:
+                    break
+                t_left -= d[a][b]
+            else:
+                yield route
+
+@pytest.mark.parametrize('name', CASES)
+def test_route_trades(name):
+    # La mejor ruta con sus mejores compras y ventas es el óptimo
+    n, d, t_max, c_max, k_0, k_min, items_by_port = CASES[name][0]
+    route_trades = RouteTrades(c_max, k_0, k_min, items_by_port)
+    best = max([k_0] + [route_trades.value(route) for route in feasible_routes(d, t_max)])
+    assert best == pytest.approx(reference(name))
+
+@pytest.mark.skipif(
+    not any(importlib.util.find_spec(backend) for backend in milp.BACKENDS),
+    reason="sin backend MILP (highspy o scipy)"
+)
+@pytest.mark.parametrize('name', CASES)
+def test_milp(name):
+    assert milp.solve(*CASES[name][0]) == pytest.approx(reference(name))
+
+def test_lns_greedy_insertion_with_negative_detour():
+    search = lns.LargeNeighborhoodSearch(*SHORTCUT)
+    assert [detour for _, _, detour in search._insertions([0, 2, 0])] == [-1.0, -1.0]
+    assert search.greedy_insertion([0, 2, 0], random.Random(0)) == [0, 1, 2, 0]
+
+def test_lns_without_triangle_inequality():
+    random.seed(0)
+    assert lns.solve(*SHORTCUT) == SHORTCUT_OPTIMUM
+
+@pytest.mark.parametrize('name', CASES)
+def test_lns(name):
+    # Heurística, pero en instancias tan pequeñas encuentra el óptimo
+    random.seed(0)
+    assert lns.solve(*CASES[name][0]) == pytest.approx(reference(name))
@@ -2,12 +2,35 @@
 """
 Validator para ejecutar casos de prueba y verificar si los resultados coinciden.
 Ejecuta los archivos test_case_*_solution.py de tester/test_cases/
+
+Con mode=pool las instancias (corpus.jsonl o test_case_*.py) se cargan como
+datos y los algoritmos corren en un pool de procesos, sin un intérprete por
+caso. Es el modo por defecto si la carpeta tiene un corpus:
+    python -m tester.validator mode=pool workers=4 timeout=30
+    python -m tester.validator mode=pool solvers=branch_and_bound,efficient
 """
 
+import json
+import os
+import random
+import runpy
+import signal
 import subprocess
 import sys
 import re
+import time
+from multiprocessing import Pool
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tester.benchmark import SOLVERS
+from tester.corpus import read_corpus
+from tester.generator import CORPUS_FILE, corpus_files, parse_arguments
+
+# Diferencia máxima entre capitales para considerar que coinciden
+MATCH_TOLERANCE = 0.01
+# Percentiles de tiempo que se informan por algoritmo
+PERCENTILES = (50, 90, 99)
 
 def parse_results(output: str):
     """Extrae los resultados brute y efficient de la salida."""
@@ -41,7 +64,217 @@ def parse_results(output: str):
     
     return brute_result, efficient_result, status
 
+class CaseTimeout(Exception):
+    """Un algoritmo superó el tiempo límite en un caso."""
+
+def load_cases(test_cases_dir: Path) -> List[Tuple[int, str, Tuple]]:
+    """
+    Instancias como (N, origen, instancia), ordenadas por N: las del corpus
+    y sus fragmentos si existen, si no las de los archivos test_case_N.py.
+    """
+    corpora = corpus_files(test_cases_dir)
+    if corpora:
+        return sorted(
+            ((meta['case'], f"{corpus.name}#{meta['case']}", instance)
+             for corpus in corpora for meta, instance in read_corpus(corpus)),
+            key=lambda case: case[0]
+        )
+
+    cases = []
+    for file in test_cases_dir.glob("test_case_*.py"):
+        parts = file.stem.split('_')
+        if len(parts) != 3 or not parts[2].isdigit():
+            continue    # test_case_N_solution.py
+        data = runpy.run_path(str(file))
+        instance = tuple(data[name] for name in (
+            'n', 'd', 't_max', 'c_max', 'k_0', 'k_min', 'items_by_port'
+        ))
+        cases.append((int(parts[2]), file.name, instance))
+    cases.sort()
+    return cases
+
+def _raise_timeout(signum, frame):
+    raise CaseTimeout()
+
+def install_timeout():
+    """
+    Prepara el proceso para run_solver. El temporizador de cada caso se
+    arma dentro del propio worker, así un caso lento no bloquea al resto ni
+    deja procesos colgados.
+    """
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+def run_solver(solver: str, instance: Tuple, timeout: float, seed: int,
+               table: Dict[str, Callable] = SOLVERS) -> Dict:
+    """
+    Capital, tiempo y estado (OK, TIMEOUT, EXECUTION_ERROR) de un algoritmo
+    de `table` (por omisión, los del benchmark).
+    """
+    # El recocido usa el generador global: cada caso es reproducible
+    random.seed(seed)
+    result = {'capital': None, 'time': None, 'status': 'OK', 'error': None}
+    start = time.perf_counter()
+    try:
+        if hasattr(signal, 'setitimer') and timeout > 0:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result['capital'] = table[solver](*instance)[0]
+        finally:
+            if hasattr(signal, 'setitimer'):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        result['time'] = time.perf_counter() - start
+    except CaseTimeout:
+        result['status'] = 'TIMEOUT'
+        result['time'] = time.perf_counter() - start
+    except Exception as e:
+        result['status'] = 'EXECUTION_ERROR'
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+def run_case(case: Tuple[int, str, Tuple], solvers: List[str],
+             timeout: float) -> Dict:
+    """Ejecuta los algoritmos sobre un caso dentro de un worker."""
+    case_num, file, instance = case
+    results = {
+        solver: run_solver(solver, instance, timeout, case_num)
+        for solver in solvers
+    }
+    return {'file': file, 'case_num': case_num, 'n': instance[0],
+            **_compare_results(results), 'results': results}
+
+def _compare_results(results: Dict[str, Dict]) -> Dict:
+    # Todos los algoritmos deben terminar y coincidir con el primero
+    failed = [r['status'] for r in results.values() if r['status'] != 'OK']
+    if failed:
+        status = 'EXECUTION_ERROR' if 'EXECUTION_ERROR' in failed else 'TIMEOUT'
+        return {'passed': False, 'status': status, 'difference': None}
+
+    capitals = [r['capital'] for r in results.values()]
+    difference = max(capitals) - min(capitals) if capitals else 0.0
+    passed = difference < MATCH_TOLERANCE
+    return {'passed': passed, 'status': 'OK' if passed else 'ERROR',
+            'difference': difference}
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentil q (0-100) por rango más cercano; None si no hay valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))     # techo de n*q/100
+    return ordered[int(rank) - 1]
+
+def timing_summary(results: List[Dict], solvers: List[str]) -> Dict[str, Dict]:
+    """Percentiles de tiempo por algoritmo sobre los casos que terminaron."""
+    summary = {}
+    for solver in solvers:
+        times = [
+            r['results'][solver]['time'] for r in results
+            if r['results'][solver]['status'] == 'OK'
+        ]
+        row = {f"p{q}": percentile(times, q) for q in PERCENTILES}
+        row.update({
+            'runs': len(times),
+            'max': max(times) if times else None,
+            'total': sum(times),
+            'timeouts': sum(
+                r['results'][solver]['status'] == 'TIMEOUT' for r in results
+            ),
+        })
+        summary[solver] = row
+    return summary
+
+def main_pool(params: Dict[str, str]) -> int:
+    """Validación en proceso con un pool de workers y resultados estructurados."""
+    solvers = [s for s in params.get('solvers', 'brute_force_JAT,efficient').split(',') if s]
+    unknown = [s for s in solvers if s not in SOLVERS]
+    if unknown:
+        print(f"❌ Algoritmos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SOLVERS)})")
+        return 2
+    workers = int(params.get('workers', os.cpu_count() or 1))
+    timeout = float(params.get('timeout', 30))
+
+    print("🚀 Validator - Comparador de Algoritmos (pool)")
+    print("=" * 50)
+
+    test_cases_dir = Path(__file__).parent / params.get('dir', 'test_cases')
+    if not test_cases_dir.exists():
+        print(f"❌ No se encuentra la carpeta: {test_cases_dir}")
+        return 1
+    cases = load_cases(test_cases_dir)
+    if not cases:
+        print(f"❌ No se encontraron {CORPUS_FILE} ni archivos test_case_*.py")
+        return 1
+    print(f"📁 Encontrados {len(cases)} casos de prueba, {workers} workers, "
+          f"límite {timeout:g}s por algoritmo y caso\n")
+
+    start = time.perf_counter()
+    results = []
+    with Pool(workers, initializer=install_timeout) as pool:
+        pending = [
+            pool.apply_async(run_case, (case, solvers, timeout)) for case in cases
+        ]
+        for job in pending:
+            result = job.get()
+            results.append(result)
+            symbol = "✓" if result['passed'] else "✗"
+            capitals = "  ".join(
+                f"{solver}={r['capital']:.2f}" if r['capital'] is not None
+                else f"{solver}={r['status']}"
+                for solver, r in result['results'].items()
+            )
+            print(f"{symbol} Caso {result['case_num']:3d}: {capitals}")
+    elapsed = time.perf_counter() - start
+
+    timing = timing_summary(results, solvers)
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+
+    print(f"\n{'='*80}")
+    print("📈 ESTADÍSTICAS")
+    print(f"{'='*80}")
+    print(f"Total casos: {len(results)} en {elapsed:.2f}s")
+    print(f"✓ Coinciden: {counts.get('OK', 0)}")
+    print(f"✗ Difieren:  {counts.get('ERROR', 0)}")
+    print(f"⏰ Timeout:  {counts.get('TIMEOUT', 0)}")
+    print(f"💥 Fallidos: {counts.get('EXECUTION_ERROR', 0)}")
+
+    print(f"\n{'algoritmo':18s} {'runs':>5s} " + " ".join(
+        f"{'p' + str(q):>9s}" for q in PERCENTILES
+    ) + f" {'máx':>9s} {'timeouts':>8s}")
+    for solver, row in timing.items():
+        cells = " ".join(
+            f"{row[f'p{q}']:8.4f}s" if row[f'p{q}'] is not None else f"{'N/A':>9s}"
+            for q in PERCENTILES
+        )
+        maximum = f"{row['max']:8.4f}s" if row['max'] is not None else f"{'N/A':>9s}"
+        print(f"{solver:18s} {row['runs']:5d} {cells} {maximum} {row['timeouts']:8d}")
+
+    output = Path(__file__).parent / "results" / "validation_report.json"
+    output.parent.mkdir(exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'solvers': solvers, 'workers': workers, 'timeout': timeout,
+            'elapsed': elapsed, 'counts': counts, 'timing': timing,
+            'cases': results,
+        }, f, indent=2)
+    print(f"\n📄 Reporte detallado guardado en: {output}")
+
+    failed = len(results) - counts.get('OK', 0)
+    if failed:
+        print(f"\n❌ {failed} casos no pasaron la validación")
+        return 1
+    print("\n✅ ¡Validación completada exitosamente!")
+    return 0
+
 def main():
+    params = parse_arguments(sys.argv[1:])
+    # Un corpus no tiene archivos de solución que ejecutar: siempre en pool
+    corpora = corpus_files(Path(__file__).parent / params.get('dir', 'test_cases'))
+    if params.get('mode', 'pool' if corpora else 'subprocess') == 'pool':
+        return main_pool(params)
+
     print("🚀 Validator - Comparador de Algoritmos")
     print("=" * 50)
     
@@ -298,7 +531,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n⏹️  Cancelado por el usuario")
         sys.exit(130)
\ No newline at end of file